@@ -0,0 +1,149 @@
+"""
+Пакетный прогон .vsh-скриптов
+
+Образ VFS загружается один раз, затем скрипты каталога выполняются в пуле
+процессов. Процессы создаются через fork и наследуют загруженное дерево без
+копирования. Перед запуском от образа отделяется неизменяемая основа, и каждый
+скрипт получает свою ветвь от нее: изменения одного скрипта не видны другим,
+вывод каждого совпадает с прогоном этого скрипта на только что загруженном
+образе, а цепочка индексов ветвей не растет с числом скриптов
+"""
+
+import copy
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+from headless import StreamOutput
+from script_runner import ScriptRunner
+from shell_core import ShellCore
+
+SLOWEST_SHOWN = 5
+
+# Неизменяемая основа загруженной VFS и конфигурация; процессы пула получают их при fork
+_base_vfs = None
+_config = None
+_output_dir = None
+
+
+def find_scripts(script_dir):
+    """Скрипты .vsh каталога в порядке имен"""
+
+    return sorted(
+        entry.path for entry in os.scandir(script_dir)
+        if entry.is_file() and entry.name.endswith(".vsh")
+    )
+
+
+def transcript_path(output_dir, script_path):
+    return os.path.join(output_dir, os.path.basename(script_path) + ".out")
+
+
+def run_one(script_path):
+    """
+    Выполняет один скрипт на собственной ветви загруженной VFS
+
+    Вывод записывается в каталог _output_dir, а если он не задан, возвращается
+    в результате вместе со статистикой ScriptRunner.run_script
+    """
+
+    # Основа не меняется, поэтому каждая ветвь строится на одном и том же слое
+    vfs = _base_vfs.fork()
+    shell = ShellCore(vfs, _config)
+
+    if _output_dir:
+        stream = open(transcript_path(_output_dir, script_path), 'w', encoding='utf-8', newline='')
+    else:
+        stream = io.StringIO(newline='')
+
+    try:
+        stats = ScriptRunner(shell, StreamOutput(stream)).run_script(script_path)
+        stats['transcript'] = None if _output_dir else stream.getvalue()
+    finally:
+        stream.close()
+    return stats
+
+
+def run_batch(vfs, config, script_dir, workers=None, output_dir=None, report=None):
+    """
+    Выполняет все скрипты каталога, по workers параллельно
+
+    Без output_dir выводы скриптов печатаются в stdout целиком, по порядку имен;
+    в report - время каждого скрипта и итог. Скрипт считается ошибочным, если он
+    не выполнен до конца или хотя бы одна его команда завершилась исключением.
+    Возвращает код завершения процесса: 0, если ошибочных скриптов нет
+    """
+
+    global _base_vfs, _config, _output_dir
+
+    report = report or sys.stderr
+    scripts = find_scripts(script_dir)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(scripts) or 1))
+
+    # Пулу нужен fork: дерево наследуется процессами, а не передается им
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        print("fork недоступен на этой платформе, скрипты выполняются последовательно", file=report)
+        workers = 1
+
+    if workers > 1:
+        # Процессы пула - демоны и не могут создавать свой пул для grep -r
+        config = copy.copy(config)
+        config.grep_workers = 1
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Ветвь, которую никто не изменяет: ее fork() не наращивает цепочку индексов
+    _base_vfs, _config, _output_dir = vfs.fork(), config, output_dir
+    started = time.perf_counter()
+    try:
+        if workers == 1:
+            results = [run_one(script_path) for script_path in scripts]
+        else:
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                # Скрипты раздаются по одному: длинные не задерживают очередь
+                results = pool.map(run_one, scripts, chunksize=1)
+    finally:
+        _base_vfs = _config = _output_dir = None
+    elapsed = time.perf_counter() - started
+
+    stream = None
+    if not output_dir:
+        sys.stdout.flush()
+        stream = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+
+    failed = 0
+    total_commands = 0
+    for stats in results:
+        total_commands += stats['commands']
+        if not stats['ok'] or stats['errors']:
+            failed += 1
+        if stream is not None:
+            stream.write(stats['transcript'])
+        if not stats['ok']:
+            status = ", ошибка"
+        elif stats['errors']:
+            status = f", команд с ошибкой: {stats['errors']}"
+        else:
+            status = ""
+        print(f"{stats['script']}: {stats['commands']} команд, {stats['seconds'] * 1000:.1f} мс"
+              f"{status}", file=report)
+    if stream is not None:
+        stream.flush()
+        stream.detach()  # sys.stdout остается открытым
+
+    scripts_speed = len(results) / elapsed if elapsed > 0 else 0.0
+    commands_speed = total_commands / elapsed if elapsed > 0 else 0.0
+    print(f"Итого: {len(results)} скриптов ({failed} с ошибкой), {total_commands} команд, "
+          f"{workers} процессов, {elapsed:.3f} с, {scripts_speed:.1f} скриптов/с, "
+          f"{commands_speed:.0f} команд/с", file=report)
+
+    slowest = sorted(results, key=lambda stats: stats['seconds'], reverse=True)[:SLOWEST_SHOWN]
+    if slowest:
+        print("Самые медленные:", file=report)
+        for stats in slowest:
+            print(f"  {stats['seconds'] * 1000:.1f} мс  {stats['script']}", file=report)
+
+    return 1 if failed else 0
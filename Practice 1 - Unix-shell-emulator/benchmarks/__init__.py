@@ -0,0 +1,5 @@
+"""
+Бенчмарки эмулятора. Запускаются из каталога эмулятора, например:
+
+    python -m benchmarks.bench_path_index
+"""
@@ -0,0 +1,86 @@
+import argparse
+import time
+
+from vfs import VFS
+
+
+def build_deep_tree(vfs, nodes, depth):
+    """
+    Строит дерево из цепочек директорий глубины depth с файлами на каждом уровне
+
+    Возвращает путь к самой глубокой директории последней цепочки
+    """
+
+    files_per_dir = 50
+    chain_size = depth * (files_per_dir + 1)
+    chains = max(1, nodes // chain_size)
+
+    deepest = None
+    for chain in range(chains):
+        parent = vfs.root
+        for level in range(depth):
+            parent = vfs._add_child(parent, f"c{chain}_l{level}", "dir")
+            for index in range(files_per_dir):
+                vfs._add_child(parent, f"file{index}.txt", "file", "")
+        deepest = parent.path
+
+    return deepest
+
+
+def legacy_current_path(node):
+    """Построение пути подъемом к корню, как до появления кэша путей"""
+
+    path_parts = []
+    while node and node.parent:
+        path_parts.insert(0, node.name)
+        node = node.parent
+    return "/" + "/".join(path_parts) if path_parts else "/"
+
+
+def measure(func, repeat):
+    """Среднее время одного вызова в микросекундах"""
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Задержка разрешения путей и построения приглашения')
+    parser.add_argument('--nodes', type=int, default=1_000_000, help='Число узлов дерева')
+    parser.add_argument('--depth', type=int, default=20, help='Глубина цепочек директорий')
+    parser.add_argument('--repeat', type=int, default=100_000, help='Число повторов каждого замера')
+    args = parser.parse_args()
+
+    vfs = VFS()
+    start = time.perf_counter()
+    deepest = build_deep_tree(vfs, args.nodes, args.depth)
+    print(f"Дерево: {len(vfs._index)} узлов, глубина {args.depth}, "
+          f"построено за {time.perf_counter() - start:.2f} с")
+
+    deep_file = deepest + "/file7.txt"
+    vfs.change_directory(deepest)
+    parent_path = deepest.rsplit("/", 1)[0]
+    vfs.change_directory(parent_path)
+    relative = deepest.rsplit("/", 1)[1] + "/file7.txt"
+
+    results = [
+        ("resolve абсолютный (индекс)", measure(lambda: vfs._resolve_path(deep_file), args.repeat)),
+        ("resolve абсолютный (обход)", measure(lambda: vfs._walk_path(deep_file), args.repeat)),
+        ("resolve относительный (индекс)", measure(lambda: vfs._resolve_path(relative), args.repeat)),
+        ("resolve относительный (обход)", measure(lambda: vfs._walk_path(relative), args.repeat)),
+    ]
+
+    vfs.change_directory(deepest)
+    results += [
+        ("приглашение (кэш пути)", measure(vfs.get_current_path, args.repeat)),
+        ("приглашение (подъем к корню)", measure(lambda: legacy_current_path(vfs.current_node), args.repeat)),
+    ]
+
+    for title, micros in results:
+        print(f"{title:<34} {micros:8.3f} мкс")
+
+
+if __name__ == "__main__":
+    main()
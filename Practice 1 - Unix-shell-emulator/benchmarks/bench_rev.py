@@ -0,0 +1,102 @@
+"""
+Пиковая память и время rev по большому файлу
+
+Создается образ с одним многострочным файлом в base64 и загружается в двух
+режимах: обычном (содержимое - строка в памяти) и --lazy-content (ссылка на
+ячейку отображенного в память CSV). Для каждого режима rev сравнивается с
+прежней реализацией, которая делила содержимое на строки, переворачивала их и
+склеивала результат в новую строку. Пик памяти меряется tracemalloc, время -
+отдельным прогоном без него; вывод команды только подсчитывается, как в
+приемнике режима --headless. Оболочка создается с настройками по умолчанию,
+поэтому в пик входит и все, что остается в ее кэше результатов
+"""
+
+import argparse
+import base64
+import os
+import tempfile
+import time
+import tracemalloc
+
+from config import Config
+from shell_core import ShellCore
+from vfs import VFS
+
+FILE_PATH = "/data/big.txt"
+
+
+def generate_big_file(csv_path, size_mb, line_length):
+    """CSV-образ с одним файлом примерно size_mb мегабайт из строк длины line_length"""
+
+    line = ("0123456789abcdef" * (line_length // 16 + 1))[:line_length]
+    lines = size_mb * (1 << 20) // (line_length + 1)
+    content = ((line + "\n") * lines).encode('utf-8')
+
+    with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+        file.write("path,type,name,content,encoding\n")
+        file.write("/,dir,data,,\n")
+        file.write(f"/data,file,big.txt,{base64.b64encode(content).decode('ascii')},base64\n")
+    return lines
+
+
+def legacy_rev(vfs):
+    """rev до потоковой обработки: split, перевернутые копии строк и join"""
+
+    content = vfs.get_file_content(FILE_PATH).content
+    lines = content.split('\n')
+    reversed_lines = [line[::-1] for line in lines]
+    return ['\n'.join(reversed_lines)]
+
+
+def streaming_rev(vfs):
+    return ShellCore(vfs, Config()).execute_stream('rev', [FILE_PATH])
+
+
+def consume(lines):
+    """Приемник вывода: считает символы, ничего не храня"""
+
+    chars = 0
+    for line in lines:
+        chars += len(line) + 1
+    return chars
+
+
+def measure(csv_path, load_options, rev):
+    """(пик памяти в МБ, секунды) одного rev на свежезагруженном образе"""
+
+    vfs = VFS(default_structure=False)
+    vfs.load_from_csv(csv_path, bulk=True, **load_options)
+    started = time.perf_counter()
+    consume(rev(vfs))
+    seconds = time.perf_counter() - started
+
+    vfs = VFS(default_structure=False)
+    vfs.load_from_csv(csv_path, bulk=True, **load_options)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    consume(rev(vfs))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (peak - baseline) / (1 << 20), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пиковая память rev по большому файлу')
+    parser.add_argument('--size-mb', type=int, default=200, help='Размер файла в мегабайтах')
+    parser.add_argument('--line-length', type=int, default=80, help='Длина строки файла')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "big.csv")
+        lines = generate_big_file(csv_path, args.size_mb, args.line_length)
+        print(f"Файл {FILE_PATH}: {args.size_mb} МБ, {lines} строк")
+
+        for mode, load_options in (("в памяти", {}), ("--lazy-content", {'lazy_content': True})):
+            for name, rev in (("split/join", legacy_rev), ("потоковый", streaming_rev)):
+                peak, seconds = measure(csv_path, load_options, rev)
+                print(f"  {mode:<15} {name:<11} пик {peak:8.1f} МБ, {seconds:6.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Время запуска эмулятора
+
+Эмулятор запускается отдельным процессом в режиме --headless со скриптом из
+одной команды. Замеряются время до первого вывода (приглашение со строкой
+скрипта) и до завершения процесса, а один запуск с python -X importtime
+показывает, какие модули дороже всего импортировать. Модули, которые при таком
+запуске загружаться не должны (tkinter, multiprocessing и др.), проверяются:
+если какой-то из них импортирован или медиана превышает --max-ms, код
+завершения 1
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+EMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Нужны только GUI, пулу процессов, журналу, снимкам, дисковому кэшу скриптов и who
+FORBIDDEN_MODULES = ("tkinter", "gui", "multiprocessing", "parallel_loader", "socket",
+                     "json", "vfs_journal", "vfs_snapshot", "hashlib", "datetime")
+
+
+def emulator_command(image, script_path, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [os.path.join(EMULATOR_DIR, "main.py"), "--headless", "--script", script_path]
+    if image:
+        command += ["--vfs", image]
+    return command
+
+
+def measure_start(image, script_path):
+    """Один запуск: (секунд до первого вывода, секунд до завершения)"""
+
+    started = time.perf_counter()
+    process = subprocess.Popen(emulator_command(image, script_path), cwd=EMULATOR_DIR,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdout.read(1)
+    first_output = time.perf_counter() - started
+    process.stdout.read()
+    process.wait()
+    return first_output, time.perf_counter() - started
+
+
+def import_times(image, script_path):
+    """
+    Разбор вывода python -X importtime: {модуль: (собственное, накопленное время в мс, вложенность)}
+    """
+
+    result = subprocess.run(emulator_command(image, script_path, importtime=True), cwd=EMULATOR_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(own) / 1000, int(cumulative) / 1000, depth)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время запуска эмулятора в режиме --headless')
+    parser.add_argument('--image', default=os.path.join(EMULATOR_DIR, "vfs_minimal.csv"),
+                        help='CSV-образ для --vfs (пустая строка - дерево по умолчанию)')
+    parser.add_argument('--runs', type=int, default=10, help='Число запусков для замера времени')
+    parser.add_argument('--top', type=int, default=15, help='Сколько самых дорогих импортов показать')
+    parser.add_argument('--max-ms', type=float, help='Предел медианы времени до первого вывода, мс')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        script_path = os.path.join(workdir, "startup.vsh")
+        with open(script_path, 'w', encoding='utf-8') as file:
+            file.write("echo ready\n")
+
+        measure_start(args.image, script_path)  # прогрев файлового кэша и __pycache__
+        samples = [measure_start(args.image, script_path) for _ in range(args.runs)]
+        modules = import_times(args.image, script_path)
+
+    first_output = statistics.median(sample[0] for sample in samples) * 1000
+    finished = statistics.median(sample[1] for sample in samples) * 1000
+    print(f"Запусков: {args.runs}, медиана до первого вывода: {first_output:.1f} мс, "
+          f"до завершения: {finished:.1f} мс")
+
+    # Верхний уровень importtime - модули, импортированные напрямую из main.py и интерпретатором
+    top_level = sorted(((cumulative, own, name) for name, (own, cumulative, depth) in modules.items()
+                        if depth == 0), reverse=True)
+    print(f"Импорты верхнего уровня (всего {sum(item[0] for item in top_level):.1f} мс):")
+    for cumulative, own, name in top_level[:args.top]:
+        print(f"  {cumulative:8.1f} мс  (собственное {own:6.1f})  {name}")
+
+    failed = False
+    loaded = [name for name in FORBIDDEN_MODULES if name in modules]
+    if loaded:
+        print(f"Ошибка: при запуске импортированы {', '.join(loaded)}", file=sys.stderr)
+        failed = True
+    if args.max_ms is not None and first_output > args.max_ms:
+        print(f"Ошибка: медиана {first_output:.1f} мс больше предела {args.max_ms:.1f} мс", file=sys.stderr)
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import base64
+import random
+
+
+EXTENSIONS = ("txt", "log", "conf", "csv", "bin")
+
+
+def build_directories(depth, fanout, needed):
+    """
+    Пути директорий дерева заданной глубины и ветвления в порядке обхода в ширину
+
+    Генерация останавливается, когда директорий достаточно для размещения файлов
+    """
+
+    directories = []
+    level = ["/"]
+    for level_number in range(1, depth + 1):
+        next_level = []
+        for parent in level:
+            for index in range(fanout):
+                name = f"dir{level_number}_{index}"
+                path = f"/{name}" if parent == "/" else f"{parent}/{name}"
+                next_level.append(path)
+                directories.append(path)
+                if len(directories) >= needed:
+                    return directories
+        level = next_level
+    return directories
+
+
+def generate_image(csv_path, files=10_000, depth=5, fanout=8, files_per_dir=20,
+                   content_size=64, base64_ratio=0.2, seed=1):
+    """
+    Создает синтетический CSV-образ VFS
+
+    Возвращает словарь с путями, пригодными для замеров: самая глубокая директория,
+    один из файлов и общее число строк
+    """
+
+    rng = random.Random(seed)
+    directories = build_directories(depth, fanout, max(1, files // max(1, files_per_dir)))
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789 "
+
+    rows = 0
+    sample_file = None
+    with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+        file.write("path,type,name,content,encoding\n")
+
+        for path in directories:
+            parent, _, name = path.rpartition("/")
+            file.write(f"{parent or '/'},dir,{name},,\n")
+            rows += 1
+
+        for index in range(files):
+            directory = directories[index % len(directories)]
+            name = f"file{index}.{EXTENSIONS[index % len(EXTENSIONS)]}"
+
+            # Строки содержимого разделены экранированным \n, как в vfs_complex.csv
+            lines = []
+            remaining = content_size
+            while remaining > 0:
+                length = min(remaining, rng.randint(8, 60))
+                lines.append("".join(rng.choices(alphabet, k=length)).strip() or "x")
+                remaining -= length + 2
+            content = "\\n".join(lines)
+
+            if rng.random() < base64_ratio:
+                encoded = base64.b64encode(content.encode('utf-8')).decode('ascii')
+                file.write(f"{directory},file,{name},{encoded},base64\n")
+            else:
+                file.write(f"{directory},file,{name},{content},\n")
+            rows += 1
+
+            if sample_file is None:
+                sample_file = f"{directory}/{name}"
+
+    return {
+        'rows': rows,
+        'directories': len(directories),
+        'files': files,
+        'deepest_dir': max(directories, key=lambda path: path.count("/")),
+        'sample_file': sample_file
+    }
+
+
+def generate_script(script_path, image_info, commands=200):
+    """Создает .vsh-скрипт, обращающийся к путям синтетического образа"""
+
+    deepest = image_info['deepest_dir']
+    sample = image_info['sample_file']
+    sample_dir, _, sample_name = sample.rpartition("/")
+    block = [
+        "who",
+        f"cd {deepest}",
+        "ls",
+        "cd ..",
+        "ls /",
+        f"cd {sample_dir}",
+        f"rev {sample_name}",
+        "echo $HOME",
+        "find . -name *.log",
+        "mkdir bench_dir",
+        "cd /",
+    ]
+
+    with open(script_path, 'w', encoding='utf-8') as file:
+        file.write("# Синтетический скрипт для бенчмарка\n")
+        for index in range(commands):
+            file.write(block[index % len(block)] + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетических образов VFS')
+    parser.add_argument('output', help='Путь к создаваемому CSV')
+    parser.add_argument('--files', type=int, default=10_000, help='Число файлов')
+    parser.add_argument('--depth', type=int, default=5, help='Максимальная глубина директорий')
+    parser.add_argument('--fanout', type=int, default=8, help='Число поддиректорий в директории')
+    parser.add_argument('--files-per-dir', type=int, default=20, help='Среднее число файлов в директории')
+    parser.add_argument('--content-size', type=int, default=64, help='Размер содержимого файла в символах')
+    parser.add_argument('--base64-ratio', type=float, default=0.2, help='Доля файлов в base64')
+    parser.add_argument('--seed', type=int, default=1, help='Начальное значение генератора случайных чисел')
+    parser.add_argument('--script', help='Дополнительно создать .vsh-скрипт по этому пути')
+    args = parser.parse_args()
+
+    info = generate_image(args.output, args.files, args.depth, args.fanout, args.files_per_dir,
+                          args.content_size, args.base64_ratio, args.seed)
+    if args.script:
+        generate_script(args.script, info)
+
+    print(f"Создан образ {args.output}: {info['rows']} строк, "
+          f"{info['directories']} директорий, {info['files']} файлов")
+
+
+if __name__ == "__main__":
+    main()
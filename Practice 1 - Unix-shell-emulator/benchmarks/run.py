@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import generate_image, generate_script
+from config import Config
+from script_runner import ScriptRunner
+from shell_core import ShellCore
+from vfs import VFS
+
+
+class NullOutput:
+    """Приемник вывода скрипта без графического интерфейса: только считает символы"""
+
+    def __init__(self):
+        self.chars = 0
+
+    def print_output(self, text):
+        self.chars += len(text)
+
+    def update_prompt(self):
+        pass
+
+
+def per_call(func, repeat):
+    """Замер среднего времени вызова"""
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - start
+    return {'repeat': repeat, 'seconds': elapsed, 'us_per_op': elapsed / repeat * 1e6}
+
+
+def load_image(csv_path, **options):
+    """Загрузка образа с подавлением построчной диагностики обычного режима"""
+
+    vfs = VFS()
+    with contextlib.redirect_stdout(io.StringIO()):
+        vfs.load_from_csv(csv_path, **options)
+    return vfs
+
+
+def describe_image(vfs):
+    """Пути для замеров в готовом образе: самая глубокая директория и любой файл"""
+
+    directories = [path for path, node in vfs._index.items() if node.type == "dir"]
+    files = [path for path, node in vfs._index.items() if node.type == "file"]
+    return {
+        'deepest_dir': max(directories, key=lambda path: path.count("/")),
+        'sample_file': files[0] if files else "/"
+    }
+
+
+def bench_load(csv_path):
+    """Замеры load_from_csv в разных режимах"""
+
+    results = {}
+    for title, options in (('load_from_csv', {}),
+                           ('load_from_csv_bulk', {'bulk': True}),
+                           ('load_from_csv_lazy', {'lazy_content': True})):
+        vfs = load_image(csv_path, **options)
+        stats = vfs.load_stats
+        results[title] = {'seconds': stats['seconds'], 'rows_per_sec': stats['rows_per_sec']}
+    return results
+
+
+def bench_operations(vfs, info, repeat):
+    """Замеры операций VFS на загруженном образе"""
+
+    deepest = info['deepest_dir']
+    sample = info['sample_file']
+    results = {
+        'resolve_path_absolute': per_call(lambda: vfs._resolve_path(sample), repeat),
+        'resolve_path_dotted': per_call(lambda: vfs._resolve_path(deepest + "/../."), repeat),
+        'list_directory': per_call(lambda: vfs.list_directory(deepest), max(1, repeat // 10)),
+        'list_directory_root': per_call(lambda: vfs.list_directory("/"), max(1, repeat // 10)),
+        'find_files_suffix': per_call(lambda: vfs.find_files("/", "*.log"), 3),
+        'find_files_substring': per_call(lambda: vfs.find_files("/", "*file1*"), 3),
+    }
+
+    counter = iter(range(10 ** 9))
+    results['create_directory'] = per_call(
+        lambda: vfs.create_directory(f"{deepest}/bench_{next(counter)}"), max(1, repeat // 10))
+    return results
+
+
+def bench_script(csv_path, script_path):
+    """
+    Полный прогон .vsh-скрипта через ShellCore без графического интерфейса
+
+    Сгенерированный скрипт повторяет одни и те же команды, поэтому кэш результатов
+    отключен: замеряется выполнение команд, а не попадания в кэш
+    """
+
+    vfs = load_image(csv_path, bulk=True)
+    output = NullOutput()
+    config = Config()
+    config.result_cache = 0
+    runner = ScriptRunner(ShellCore(vfs, config), output)
+
+    with open(script_path, encoding='utf-8') as file:
+        commands = sum(1 for line in file if line.strip() and not line.strip().startswith('#'))
+
+    start = time.perf_counter()
+    runner.run_script(script_path)
+    elapsed = time.perf_counter() - start
+    return {
+        'commands': commands,
+        'seconds': elapsed,
+        'commands_per_sec': commands / elapsed if elapsed > 0 else 0.0,
+        'output_chars': output.chars
+    }
+
+
+def current_commit():
+    """Хэш текущего коммита, если каталог находится в git-репозитории"""
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Печатает отношение времени к базовому запуску по каждому замеру"""
+
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+
+    for group, metrics in results.items():
+        for name, values in metrics.items():
+            old = baseline.get(group, {}).get(name)
+            if not old:
+                continue
+            key = 'us_per_op' if 'us_per_op' in values else 'seconds'
+            if old.get(key):
+                ratio = values[key] / old[key]
+                print(f"{group}.{name:<28} {ratio:6.2f}x", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки VFS и ShellCore без графического интерфейса')
+    parser.add_argument('--files', type=int, default=100_000, help='Число файлов синтетического образа')
+    parser.add_argument('--depth', type=int, default=6, help='Глубина директорий')
+    parser.add_argument('--fanout', type=int, default=8, help='Ветвление директорий')
+    parser.add_argument('--files-per-dir', type=int, default=20, help='Файлов в директории')
+    parser.add_argument('--content-size', type=int, default=256, help='Размер содержимого файла')
+    parser.add_argument('--repeat', type=int, default=10_000, help='Повторов для коротких операций')
+    parser.add_argument('--image', help='Использовать существующий CSV вместо синтетического')
+    parser.add_argument('--output', help='Файл для JSON с результатами (по умолчанию stdout)')
+    parser.add_argument('--baseline', help='JSON предыдущего запуска для сравнения')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.image:
+            csv_path = args.image
+            info = describe_image(load_image(csv_path, bulk=True))
+        else:
+            csv_path = os.path.join(workdir, "image.csv")
+            info = generate_image(csv_path, args.files, args.depth, args.fanout,
+                                  args.files_per_dir, args.content_size)
+
+        script_path = os.path.join(workdir, "bench.vsh")
+        generate_script(script_path, info)
+
+        results = {'load': bench_load(csv_path)}
+        vfs = load_image(csv_path, bulk=True)
+        results['vfs'] = bench_operations(vfs, info, args.repeat)
+        results['script'] = {'synthetic': bench_script(csv_path, script_path)}
+
+        # Стартовые скрипты репозитория на образе vfs_complex.csv
+        emulator_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for name in sorted(os.listdir(emulator_dir)):
+            if name.endswith(".vsh"):
+                results['script'][name] = bench_script(os.path.join(emulator_dir, "vfs_complex.csv"),
+                                                       os.path.join(emulator_dir, name))
+
+    report = {
+        'meta': {
+            'commit': current_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'params': vars(args)
+        },
+        'results': results
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import threading
+
+
+class CommandCancelled(Exception):
+    """Команда прервана пользователем (Ctrl+C)"""
+
+
+class CancelToken:
+    """
+    Признак отмены выполняемой команды
+
+    Устанавливается из потока интерфейса, а длительные обходы VFS в рабочем
+    потоке периодически вызывают check() и прерываются исключением CommandCancelled
+    """
+
+    __slots__ = ('_event',)
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise CommandCancelled()
@@ -9,7 +9,27 @@ class Config:
     def __init__(self):
         self.vfs_path = None        # путь к физическому расположению VFS
         self.script_path = None     # путь к стартовому скрипту
+        self.script_paths = []      # все скрипты, переданные в --script
         self.raw_arguments = []     # аргументы при запуске
+        self.bulk_load = False      # потоковая загрузка VFS без построчной диагностики
+        self.lazy_content = False   # ленивое чтение содержимого файлов из отображенного в память CSV
+        self.content_cache = 0      # размер LRU декодированного содержимого (0 - без LRU)
+        self.name_index = False     # индекс имен для быстрого find
+        self.vfs_snapshot = False   # загрузка через двоичный снимок рядом с CSV
+        self.load_workers = 1       # число процессов для разбора CSV
+        self.headless = False       # выполнение скриптов без графического интерфейса
+        self.output_path = None     # файл для вывода скриптов в режиме --headless
+        self.scrollback = 10000     # предел строк в области вывода окна (0 - без предела)
+        self.script_cache_dir = None  # каталог дискового кэша скомпилированных скриптов
+        self.serve_address = None   # адрес многосеансового сервера ("host:port" или "unix:путь")
+        self.journal_path = None    # журнал изменений VFS поверх базового образа
+        self.compact = False        # уплотнить журнал в новый базовый CSV и завершиться
+        self.batch_dir = None       # каталог скриптов для пакетного прогона
+        self.batch_workers = None   # число процессов пакетного прогона (None - по числу ядер)
+        self.batch_output = None    # каталог выводов пакетного прогона (None - stdout)
+        self.result_cache = 256     # размер LRU результатов чистых команд (0 - без кэша)
+        self.result_cache_mb = 64   # общий для всех оболочек процесса предел памяти кэшей результатов, МБ
+        self.grep_workers = 0       # процессы для grep -r по большим поддеревьям (0 - по числу ядер)
 
     def parse_arguments(self):
         """Парсинг аргументов командной строки"""
@@ -28,8 +48,143 @@ class Config:
 
         parser.add_argument(
             '--script',
-            dest='script_path',
-            help='Путь к стартовому скрипту для выполнения'
+            dest='script_paths',
+            nargs='+',
+            default=[],
+            help='Путь к стартовому скрипту для выполнения (можно указать несколько)'
+        )
+
+        parser.add_argument(
+            '--bulk-load',
+            dest='bulk_load',
+            action='store_true',
+            help='Быстрая потоковая загрузка больших CSV без построчного вывода'
+        )
+
+        parser.add_argument(
+            '--lazy-content',
+            dest='lazy_content',
+            action='store_true',
+            help='Не декодировать содержимое файлов при загрузке, читать его из CSV по требованию'
+        )
+
+        parser.add_argument(
+            '--content-cache',
+            dest='content_cache',
+            type=int,
+            default=0,
+            help='Размер LRU декодированного содержимого для --lazy-content'
+        )
+
+        parser.add_argument(
+            '--name-index',
+            dest='name_index',
+            action='store_true',
+            help='Строить индекс имен (расширения и триграммы) для быстрого find'
+        )
+
+        parser.add_argument(
+            '--vfs-snapshot',
+            dest='vfs_snapshot',
+            action='store_true',
+            help='Использовать двоичный снимок <vfs>.snapshot, пересобирая его при изменении CSV'
+        )
+
+        parser.add_argument(
+            '--load-workers',
+            dest='load_workers',
+            type=int,
+            default=1,
+            help='Число процессов для параллельного разбора CSV'
+        )
+
+        parser.add_argument(
+            '--headless',
+            dest='headless',
+            action='store_true',
+            help='Выполнить скрипты без графического интерфейса и завершиться'
+        )
+
+        parser.add_argument(
+            '--output',
+            dest='output_path',
+            help='Файл для вывода скриптов в режиме --headless (по умолчанию stdout)'
+        )
+
+        parser.add_argument(
+            '--scrollback',
+            dest='scrollback',
+            type=int,
+            default=10000,
+            help='Сколько последних строк хранить в области вывода (0 - без ограничения)'
+        )
+
+        parser.add_argument(
+            '--script-cache',
+            dest='script_cache_dir',
+            help='Каталог для кэша скомпилированных .vsh-скриптов'
+        )
+
+        parser.add_argument(
+            '--serve',
+            dest='serve_address',
+            help='Запустить многосеансовый сервер оболочки: host:port, port или unix:/путь'
+        )
+
+        parser.add_argument(
+            '--journal',
+            dest='journal_path',
+            help='Журнал изменений VFS: применяется при запуске, изменения дописываются в него'
+        )
+
+        parser.add_argument(
+            '--compact',
+            dest='compact',
+            action='store_true',
+            help='Записать образ с примененным журналом в CSV из --vfs, очистить журнал и завершиться'
+        )
+
+        parser.add_argument(
+            '--batch',
+            dest='batch_dir',
+            help='Выполнить все .vsh-скрипты каталога параллельно, каждый на своей копии VFS'
+        )
+
+        parser.add_argument(
+            '--batch-workers',
+            dest='batch_workers',
+            type=int,
+            help='Число процессов для --batch (по умолчанию по числу ядер)'
+        )
+
+        parser.add_argument(
+            '--batch-output',
+            dest='batch_output',
+            help='Каталог для выводов скриптов --batch (<имя скрипта>.out), по умолчанию stdout'
+        )
+
+        parser.add_argument(
+            '--result-cache',
+            dest='result_cache',
+            type=int,
+            default=256,
+            help='Сколько результатов ls, find, du, tree, grep и wc кэшировать до изменения VFS (0 - без кэша)'
+        )
+
+        parser.add_argument(
+            '--result-cache-mb',
+            dest='result_cache_mb',
+            type=int,
+            default=64,
+            help='Общий для всех сеансов предел памяти кэшей результатов, МБ'
+        )
+
+        parser.add_argument(
+            '--grep-workers',
+            dest='grep_workers',
+            type=int,
+            default=0,
+            help='Число процессов для grep -r по большим поддеревьям (0 - по числу ядер, 1 - без пула)'
         )
 
         # Сохраняем исходные аргументы (кроме имени скрипта - main.py)
@@ -38,9 +193,40 @@ class Config:
         # Парсим аргументы
         args = parser.parse_args()
 
+        self.bulk_load = args.bulk_load
+        self.lazy_content = args.lazy_content
+        self.content_cache = args.content_cache
+        self.name_index = args.name_index
+        self.vfs_snapshot = args.vfs_snapshot
+        self.load_workers = max(1, args.load_workers)
+
+        self.headless = args.headless
+        self.output_path = args.output_path
+        self.scrollback = max(0, args.scrollback)
+        self.result_cache = max(0, args.result_cache)
+        self.result_cache_mb = max(0, args.result_cache_mb)
+        self.grep_workers = max(0, args.grep_workers)
+
+        self.serve_address = args.serve_address
+        self.compact = args.compact
+
+        if args.batch_dir:
+            self.batch_dir = self._resolve_path(args.batch_dir)
+        if args.batch_workers:
+            self.batch_workers = max(1, args.batch_workers)
+        if args.batch_output:
+            self.batch_output = os.path.abspath(args.batch_output)
+
+        if args.journal_path:
+            self.journal_path = os.path.abspath(args.journal_path)
+
+        if args.script_cache_dir:
+            self.script_cache_dir = os.path.abspath(args.script_cache_dir)
+
         # Преобразуем относительные пути в абсолютные
-        if args.script_path:
-            self.script_path = self._resolve_path(args.script_path)
+        self.script_paths = [self._resolve_path(path) for path in args.script_paths]
+        if self.script_paths:
+            self.script_path = self.script_paths[0]
 
         if args.vfs_path:
             self.vfs_path = self._resolve_path(args.vfs_path)
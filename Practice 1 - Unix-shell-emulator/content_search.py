@@ -0,0 +1,147 @@
+"""
+Поиск по содержимому файлов VFS (grep)
+
+Рекурсивный поиск делит файлы поддерева на пачки в порядке путей. Небольшие
+поддеревья просматриваются в текущем процессе, большие - пулом процессов,
+созданных через fork в момент поиска: процессы видят дерево таким, каким оно
+было при запуске команды, и ничего не копируют. Результаты пачек собираются
+в исходном порядке, поэтому вывод не зависит от числа процессов, а первая
+готовая пачка выводится сразу. fork копирует только вызвавший поток, поэтому
+пул создается лишь из главного потока; из рабочего потока окна или сервера,
+как и из процесса пакетного прогона, поиск идет в текущем процессе
+"""
+
+import re
+import threading
+from itertools import chain
+
+from vfs_content import LazyContent
+
+CHUNK_FILES = 256           # наибольшее число файлов в пачке
+CHUNK_BYTES = 1 << 22       # примерный предел символов содержимого в пачке
+PARALLEL_MIN_FILES = 2048   # на меньших поддеревьях запуск пула дороже самого поиска
+
+# VFS, в которой ищут процессы пула; процессы получают ее при fork
+_vfs = None
+
+
+def read_content(node):
+    """
+    Содержимое файла для поиска
+
+    Ленивое содержимое декодируется без сохранения в узле: проход grep по всему
+    образу не должен оставлять в памяти декодированную копию каждого файла
+    """
+
+    content = node._content
+    if content.__class__ is LazyContent:
+        return content.load()
+    return content or ""
+
+
+def split_lines(content):
+    """Строки содержимого; завершающий перевод строки не дает лишней пустой строки"""
+
+    if not content:
+        return []
+    lines = content.split('\n')
+    if content.endswith('\n'):
+        lines.pop()
+    return lines
+
+
+def search_content(regex, content, count_only):
+    """Совпавшие строки содержимого либо их число при count_only"""
+
+    matches = filter(regex.search, split_lines(content))
+    if count_only:
+        return sum(1 for _ in matches)
+    return list(matches)
+
+
+def _chunks(files):
+    """Пути файлов, сгруппированные в пачки по числу файлов и объему содержимого"""
+
+    chunk = []
+    size = 0
+    for node in files:
+        chunk.append(node.path)
+        content = node._content
+        size += content.length if content.__class__ is LazyContent else len(content or "")
+        if len(chunk) >= CHUNK_FILES or size >= CHUNK_BYTES:
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+
+def _search_chunk(task):
+    """Поиск в пачке файлов в процессе пула: [(путь, строки или число)]"""
+
+    pattern, flags, paths, count_only = task
+    regex = re.compile(pattern, flags)  # модуль re кэширует скомпилированный шаблон
+    index = _vfs._index
+
+    results = []
+    for path in paths:
+        found = search_content(regex, read_content(index[path]), count_only)
+        if found or count_only:
+            results.append((path, found))
+    return results
+
+
+def search_files(vfs, regex, files, count_only=False, workers=1, cancel=None):
+    """
+    Поиск regex в файлах files (итератор узлов в нужном порядке)
+
+    Выдает (путь, совпавшие строки) для файлов с совпадениями, а при count_only -
+    (путь, число совпадений) для каждого файла. Порядок совпадает с порядком files
+    """
+
+    global _vfs
+
+    chunks = _chunks(files)
+    head = []
+    files_seen = 0
+    if workers > 1 and threading.current_thread() is not threading.main_thread():
+        # Потомок fork из рабочего потока наследовал бы блокировки других потоков
+        workers = 1
+    if workers > 1:
+        import multiprocessing  # не замедляет запуск эмулятора, пока пул не нужен
+        if "fork" not in multiprocessing.get_all_start_methods():
+            workers = 1
+        elif multiprocessing.current_process().daemon:
+            workers = 1     # процесс чужого пула не может создавать дочерние процессы
+    if workers > 1:
+        # Пул нужен, только если файлов много: первые пачки набираются заранее
+        for chunk in chunks:
+            head.append(chunk)
+            files_seen += len(chunk)
+            if files_seen >= PARALLEL_MIN_FILES:
+                break
+            if cancel is not None:
+                cancel.check()
+
+    if files_seen < PARALLEL_MIN_FILES:
+        index = vfs._index
+        for chunk in chain(head, chunks):
+            if cancel is not None:
+                cancel.check()
+            for path in chunk:
+                found = search_content(regex, read_content(index[path]), count_only)
+                if found or count_only:
+                    yield path, found
+        return
+
+    tasks = ((regex.pattern, regex.flags, chunk, count_only) for chunk in chain(head, chunks))
+    _vfs = vfs
+    try:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            # imap возвращает пачки по порядку, как только готова очередная
+            for results in pool.imap(_search_chunk, tasks):
+                if cancel is not None:
+                    cancel.check()  # выход из with завершает процессы пула
+                yield from results
+    finally:
+        _vfs = None
@@ -1,16 +1,71 @@
+import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import scrolledtext, Entry, Frame
 
+from cancellation import CancelToken, CommandCancelled
+from script_runner import ScriptRunner
+
+
+class ScriptOutput:
+    """
+    Приемник вывода скрипта в рабочем потоке
+
+    Повторяет интерфейс ShellGUI, которым пользуется ScriptRunner, но текст не
+    выводит, а передает потоку интерфейса через очередь пачками
+    """
+
+    def __init__(self, results, cancel, batch_lines, batch_seconds):
+        self.results = results              # очередь результатов ShellGUI
+        self.cancel = cancel                # CancelToken выполняемых скриптов
+        self.batch_lines = batch_lines
+        self.batch_seconds = batch_seconds
+        self._batch = []
+        self._deadline = time.monotonic() + batch_seconds
+
+    def print_output(self, text):
+        self.cancel.check()
+        self._batch.append(text)
+        if len(self._batch) >= self.batch_lines or time.monotonic() >= self._deadline:
+            self.flush()
+
+    def update_prompt(self):
+        pass  # приглашение обновит поток интерфейса после завершения скриптов
+
+    def flush(self):
+        if self._batch:
+            self.results.put(('text', "".join(self._batch)))
+            self._batch = []
+        self._deadline = time.monotonic() + self.batch_seconds
+
 
 class ShellGUI:
     """Графический интерфейс"""
 
+    POLL_INTERVAL = 50      # период опроса результатов рабочего потока, мс
+    BATCH_LINES = 1000      # строк в одной пачке вывода рабочего потока
+    BATCH_SECONDS = 0.05    # наибольшая задержка пачки вывода, с
+    POLL_BATCHES = 20       # наибольшее число сообщений, разбираемых за один опрос
+    QUEUE_BATCHES = 64      # предел очереди: при заполнении рабочий поток ждет окно
+
     # Конструктор
     def __init__(self, root, shell_core, vfs):
         self.root = root            # окно приложения
         self.shell = shell_core     # ядро для выполнения команд
         self.vfs = vfs              # файловая система для отображения пути
 
+        # Буфер вывода: текст накапливается и выводится одним обновлением за такт цикла событий
+        self.scrollback = shell_core.config.scrollback  # предел строк в области вывода (0 - без предела)
+        self._pending = []          # фрагменты, еще не выведенные в виджет
+        self._pending_lines = 0     # число строк в буфере
+        self._flush_scheduled = False
+
+        # Команды выполняются в рабочем потоке, вывод приходит через очередь
+        self._results = queue.Queue(self.QUEUE_BATCHES)    # пачки вывода и сообщения рабочего потока
+        self._cancel = None             # CancelToken выполняемой команды (None - оболочка свободна)
+
         self.setup_gui()            # настройка графического интерфейса
         self.print_welcome()        # приветственное сообщение
 
@@ -73,14 +128,61 @@ class ShellGUI:
         # Реагирование на клавишу Enter
         self.command_entry.bind("<Return>", self.execute_command)
 
+        # Tab дополняет имя команды или путь
+        self.command_entry.bind("<Tab>", self.complete_command)
+
+        # Ctrl+C прерывает выполняемую команду
+        self.root.bind("<Control-c>", self.cancel_command)
+
         # Фокус на поля ввода, автоматически ставящий на него курсор
         self.command_entry.focus()
 
     def print_output(self, text):
-        """Вывод текста в область вывода"""
+        """
+        Вывод текста в область вывода
+
+        Текст попадает в буфер, виджет обновляется один раз, когда цикл событий
+        освободится, поэтому тысячи вызовов подряд стоят одной вставки
+        """
+
+        self._pending.append(text)
+        self._pending_lines += text.count("\n")
+
+        # Строки сверх предела все равно будут обрезаны - не держим их в памяти
+        if self.scrollback and self._pending_lines > 2 * self.scrollback:
+            self._compact_pending()
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after_idle(self.flush_output)
+
+    def _compact_pending(self):
+        """Оставляет в буфере только последние scrollback строк"""
+
+        tail = "".join(self._pending).split("\n")[-(self.scrollback + 1):]
+        self._pending = ["\n".join(tail)]
+        self._pending_lines = len(tail) - 1
+
+    def flush_output(self):
+        """Выводит накопленный текст и обрезает область вывода до scrollback строк"""
+
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._pending_lines = 0
 
         self.output_area.config(state=tk.NORMAL)    # разблокируем текстовое поле
         self.output_area.insert(tk.END, text)       # вставляем текст в конец
+
+        if self.scrollback:
+            # Номер последней строки; старые строки удаляются одним вызовом
+            lines = int(self.output_area.index("end-1c").split(".")[0]) - 1
+            if lines > self.scrollback:
+                self.output_area.delete("1.0", f"{lines - self.scrollback + 1}.0")
+
         self.output_area.see(tk.END)                # прокручиваем до конца, чтобы видеть последний вывод
         self.output_area.config(state=tk.DISABLED)  # блокируем текстовое поле
 
@@ -89,7 +191,7 @@ class ShellGUI:
 
         welcome_msg = f"""
 Добро пожаловать в эмулятор командной строки {self.vfs.name}!
-Доступные команды: echo, ls, cd, find, rev, who, mkdir, exit
+Доступные команды: echo, ls, cd, find, rev, grep, wc, cat, who, mkdir, du, tree, exit
 Для выхода введите 'exit'
 
 Введенные параметры запуска: {self.shell.config.get_startup_parameters()}
@@ -106,8 +208,17 @@ class ShellGUI:
             text=f"{self.vfs.name}:{self.vfs.get_current_path()}$ "
         )
 
+    def set_busy(self):
+        """Приглашение на время выполнения команды"""
+
+        self.prompt_label.config(text=f"{self.vfs.name}: выполняется... (Ctrl+C - прервать) ")
+
     def execute_command(self, event=None):  # параметр event=None для обработки нажатия Enter
-        """Выполнение введенной команды"""
+        """Запуск введенной команды в рабочем потоке"""
+
+        # Пока выполняется предыдущая команда, новая не принимается
+        if self._cancel is not None:
+            return "break"
 
         # Получаем текст из поля ввода
         command_text = self.command_entry.get().strip()
@@ -118,14 +229,135 @@ class ShellGUI:
         # Выводим команду пользователя
         self.print_output(f"{self.vfs.name}:{self.vfs.get_current_path()}$ {command_text}\n")
 
-        # Парсим и выполняем команду
+        # Парсим команду и выполняем ее вне цикла событий, чтобы окно не зависало
         command, args = self.shell.parse_command(command_text)
-        result = self.shell.execute(command, args)
+        self._cancel = CancelToken()
+        self.set_busy()
+        threading.Thread(target=self._run_command, args=(command, args, self._cancel), daemon=True).start()
+        self.root.after(self.POLL_INTERVAL, self._poll_results)
+
+    def run_scripts(self, script_paths):
+        """Запуск скриптов в рабочем потоке; до их завершения окно не принимает команды"""
+
+        if self._cancel is not None:
+            return
+
+        self._cancel = CancelToken()
+        self.set_busy()
+        threading.Thread(target=self._run_scripts, args=(script_paths, self._cancel), daemon=True).start()
+        self.root.after(self.POLL_INTERVAL, self._poll_results)
+
+    def _run_scripts(self, script_paths, cancel):
+        """Выполнение скриптов в рабочем потоке, вывод передается через очередь"""
+
+        output = ScriptOutput(self._results, cancel, self.BATCH_LINES, self.BATCH_SECONDS)
+        runner = ScriptRunner(self.shell, output)
+        cancelled = False
+        try:
+            for script_path in script_paths:
+                runner.run_script(script_path, cancel)
+        except CommandCancelled:
+            cancelled = True
+        finally:
+            output.flush()
+            self._results.put(('done', cancelled))
+
+    def _run_command(self, command, args, cancel):
+        """
+        Выполнение команды в рабочем потоке
+
+        С виджетами работает только поток интерфейса, поэтому результат
+        передается через очередь пачками строк
+        """
+
+        batch = []
+        deadline = time.monotonic() + self.BATCH_SECONDS
+        cancelled = False
+        try:
+            for result in self.shell.execute_stream(command, args, cancel):
+                cancel.check()
+                if result == "EXIT":
+                    self._results.put(('exit', None))
+                    return
+                batch.append(result)
+                if len(batch) >= self.BATCH_LINES or time.monotonic() >= deadline:
+                    self._results.put(('output', batch))
+                    batch = []
+                    deadline = time.monotonic() + self.BATCH_SECONDS
+        except CommandCancelled:
+            cancelled = True
+        finally:
+            if batch:
+                self._results.put(('output', batch))
+            self._results.put(('done', cancelled))
+
+    def _poll_results(self):
+        """
+        Переносит вывод рабочего потока в область вывода
+
+        За один опрос разбирается не больше POLL_BATCHES сообщений, остальные
+        ждут следующего: быстрый рабочий поток не задерживает обработку событий окна
+        """
+
+        for _ in range(self.POLL_BATCHES):
+            try:
+                kind, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'output':
+                self.print_output("".join(f"{result}\n" for result in payload))
+            elif kind == 'text':
+                self.print_output(payload)
+            elif kind == 'exit':
+                self.root.quit()
+                return
+            else:
+                if payload:
+                    self.print_output("^C\n")
+                self._cancel = None
+                self.update_prompt()
+                return
+
+        self.root.after(self.POLL_INTERVAL, self._poll_results)
+
+    def complete_command(self, event=None):
+        """
+        Дополнение по Tab: первое слово - имя команды, остальные - путь в VFS
+
+        Единственный вариант подставляется целиком, при нескольких подставляется
+        общее начало, а если оно уже введено - варианты выводятся списком
+        """
+
+        # Пока команда выполняется в рабочем потоке, дерево не читаем
+        if self._cancel is not None:
+            return "break"
+
+        cursor = self.command_entry.index(tk.INSERT)
+        head = self.command_entry.get()[:cursor]
+        start = head.rfind(" ") + 1
+        word = head[start:]
+
+        if start == 0:
+            options = sorted(name for name in self.shell.commands if name.startswith(word))
+        else:
+            options = self.vfs.complete_path(word)
+        if not options:
+            return "break"
+
+        common = os.path.commonprefix(options)
+        if len(options) == 1 and not common.endswith("/"):
+            common += " "  # имя завершено, можно вводить следующий аргумент
+
+        if len(common) > len(word):
+            self.command_entry.delete(start, cursor)
+            self.command_entry.insert(start, common)
+        elif len(options) > 1:
+            self.print_output("  ".join(options) + "\n")
+
+        return "break"  # Tab не переводит фокус на следующий виджет
 
-        # Обрабатываем результат
-        if result == "EXIT":
-            self.root.quit()
-        elif result:
-            self.print_output(f"{result}\n")
+    def cancel_command(self, event=None):
+        """Отмена выполняемой команды по Ctrl+C"""
 
-        self.update_prompt()
\ No newline at end of file
+        if self._cancel is not None:
+            self._cancel.cancel()
@@ -0,0 +1,75 @@
+import io
+import sys
+
+from script_runner import ScriptRunner
+
+
+class StreamOutput:
+    """
+    Приемник вывода для режима без графического интерфейса
+
+    Повторяет интерфейс ShellGUI, которым пользуется ScriptRunner, поэтому
+    текст скрипта совпадает с выводом в окне эмулятора байт в байт
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def print_output(self, text):
+        self.stream.write(text)
+
+    def update_prompt(self):
+        pass  # приглашения вне окна нет
+
+
+def open_output(output_path=None):
+    """
+    Буферизованный поток UTF-8 для вывода скриптов
+
+    Переводы строк не преобразуются, чтобы вывод совпадал на всех платформах
+    """
+
+    if output_path:
+        return open(output_path, 'w', encoding='utf-8', newline='', buffering=1 << 20)
+    sys.stdout.flush()
+    return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', write_through=False)
+
+
+def run_headless(shell_core, script_paths, output_path=None, report=None):
+    """
+    Выполняет скрипты без tkinter и печатает в report время и скорость каждого
+
+    Возвращает код завершения процесса: 0, если все скрипты выполнены
+    """
+
+    report = report or sys.stderr
+    stream = open_output(output_path)
+    runner = ScriptRunner(shell_core, StreamOutput(stream))
+
+    total_commands = 0
+    total_seconds = 0.0
+    failed = 0
+
+    try:
+        for script_path in script_paths:
+            stats = runner.run_script(script_path)
+            total_commands += stats['commands']
+            total_seconds += stats['seconds']
+            if not stats['ok']:
+                failed += 1
+
+            speed = stats['commands'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+            print(f"{script_path}: {stats['commands']} команд, {stats['seconds'] * 1000:.1f} мс, "
+                  f"{speed:.0f} команд/с{'' if stats['ok'] else ', ошибка'}", file=report)
+    finally:
+        stream.flush()
+        if output_path:
+            stream.close()
+        else:
+            stream.detach()  # sys.stdout остается открытым
+
+    speed = total_commands / total_seconds if total_seconds > 0 else 0.0
+    print(f"Итого: {len(script_paths)} скриптов, {total_commands} команд, "
+          f"{total_seconds:.3f} с, {speed:.0f} команд/с", file=report)
+
+    return 1 if failed else 0
@@ -1,9 +1,11 @@
-import tkinter as tk
-from shell_core import ShellCore
+import atexit
+import os
+import sys
 from vfs import VFS
-from gui import ShellGUI
 from config import Config
-from script_runner import ScriptRunner
+
+# ShellCore, ScriptRunner и tkinter импортируются только в тех режимах, где нужны:
+# --compact и --serve обходятся без них, --headless и --batch - без tkinter
 
 
 def main():
@@ -11,31 +13,115 @@ def main():
     config = Config()
     config.parse_arguments()
 
-    # Инициализируем vfs
-    vfs = VFS()
+    # В режимах --headless, --batch и --serve окна нет, сообщения идут в stderr
+    no_window = config.headless or bool(config.batch_dir) or bool(config.serve_address)
+    log = sys.stderr if no_window else sys.stdout
+
+    # Инициализируем vfs; если указан образ, дерево по умолчанию не строится
+    vfs = VFS(default_structure=not config.vfs_path)
+    if config.name_index:
+        vfs.enable_name_index()
 
     # Загружаем VFS из CSV если указан путь
+    image_loaded = False
     if config.vfs_path:
         try:
-            vfs.load_from_csv(config.vfs_path)
-            print(f"VFS загружена из: {config.vfs_path}")
+            load_options = {
+                # Построчная диагностика загрузки без окна не нужна
+                'bulk': config.bulk_load or no_window,
+                'lazy_content': config.lazy_content,
+                'content_cache_size': config.content_cache,
+                'workers': config.load_workers
+            }
+            if config.vfs_snapshot:
+                # Снимок рядом с CSV пересобирается, только если CSV изменился
+                from_snapshot, snapshot_error = vfs.load_with_snapshot(config.vfs_path, **load_options)
+                if from_snapshot:
+                    print(f"VFS загружена из снимка: {config.vfs_path}.snapshot", file=log)
+                elif snapshot_error:
+                    print(f"VFS загружена из: {config.vfs_path}", file=log)
+                    print(snapshot_error, file=log)
+                else:
+                    print(f"VFS загружена из: {config.vfs_path}, снимок обновлен", file=log)
+            else:
+                vfs.load_from_csv(config.vfs_path, **load_options)
+                print(f"VFS загружена из: {config.vfs_path}", file=log)
+            image_loaded = True
+            stats = vfs.load_stats
+            print(f"Строк: {stats['rows']}, время: {stats['seconds']:.3f} с, "
+                  f"скорость: {stats['rows_per_sec']:.0f} строк/с", file=log)
+            if stats['files']:
+                print(f"Уникальное содержимое: {stats['unique_contents']} из {stats['files']} файлов, "
+                      f"дедупликация: {stats['dedup_ratio']:.2f}x", file=log)
         except Exception as e:
-            print(f"Ошибка загрузки VFS: {str(e)}")
+            print(f"Ошибка загрузки VFS: {str(e)}", file=log)
             # Продолжаем с VFS по умолчанию
-    
+            vfs.load_default()
+
+    # Журнал изменений применяется поверх загруженного образа; к дереву по умолчанию
+    # вместо незагруженного образа его не подключаем, чтобы не смешать изменения
+    if config.journal_path and config.vfs_path and not image_loaded:
+        print(f"Журнал {config.journal_path} не подключен: образ не загружен", file=log)
+        if config.compact:
+            print(f"Образ {config.vfs_path} не загружен, уплотнение отменено", file=sys.stderr)
+            sys.exit(1)
+    elif config.journal_path:
+        base_stamp = (0, 0)
+        if config.vfs_path and os.path.exists(config.vfs_path):
+            info = os.stat(config.vfs_path)
+            base_stamp = (info.st_mtime_ns, info.st_size)
+        try:
+            applied = vfs.attach_journal(config.journal_path, base_stamp)
+            atexit.register(vfs.journal.close)
+            print(f"Журнал {config.journal_path}: применено изменений: {applied}", file=log)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка журнала: {str(e)}", file=log)
+
+    # Уплотнение: образ с примененным журналом становится новым базовым CSV
+    if config.compact:
+        if not config.vfs_path or vfs.journal is None:
+            print("Для --compact нужны --vfs и --journal", file=sys.stderr)
+            sys.exit(1)
+        try:
+            vfs.compact_journal(config.vfs_path)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка уплотнения: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Журнал уплотнен в {config.vfs_path}", file=log)
+        return
+
+    # Пакетный прогон: образ загружен один раз, скрипты выполняются в пуле процессов
+    if config.batch_dir:
+        from batch_runner import run_batch
+        sys.exit(run_batch(vfs, config, config.batch_dir, config.batch_workers, config.batch_output))
+
+    # Сервер: сеансы подключаются к уже загруженному дереву
+    if config.serve_address:
+        from server import run_server
+        run_server(vfs, config)
+        return
+
+    from shell_core import ShellCore
+    shell_core = ShellCore(vfs, config)
+
+    # Без графического интерфейса: выполняем скрипты и завершаемся, tkinter не импортируется
+    if config.headless:
+        from headless import run_headless
+        sys.exit(run_headless(shell_core, config.script_paths, config.output_path))
+
+    import tkinter as tk
+    from gui import ShellGUI
 
     # Инициализируем компоненты системы
     root = tk.Tk()
-    shell_core = ShellCore(vfs, config)
     gui = ShellGUI(root, shell_core, vfs)
 
-     # Если указан скрипт - выполняем его
-    if config.script_path:
-        script_runner = ScriptRunner(shell_core, gui)
-        root.after(100, lambda: script_runner.run_script(config.script_path))
+     # Если указан скрипт - выполняем его в рабочем потоке окна, как введенные команды
+    if config.script_paths:
+        root.after(100, gui.run_scripts, config.script_paths)
 
     root.mainloop()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
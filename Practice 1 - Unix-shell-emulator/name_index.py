@@ -0,0 +1,143 @@
+import re
+
+# Символы шаблона glob, которые не являются литералами
+_WILDCARD_RUN = re.compile(r'\*|\?|\[!?\]?[^\]]*\]?')
+
+
+class NameIndex:
+    """
+    Индекс имен узлов VFS для быстрого find
+
+    Индексируются уникальные имена, а не узлы: одинаковые имена (README, index.html)
+    в большом образе попадают в индекс один раз. Для каждого имени хранится список
+    узлов, кроме того ведутся карта расширений и триграммный индекс имен.
+    Каждому узлу присваивается возрастающий номер seq, по которому результаты
+    упорядочиваются так же, как при обходе дерева
+    """
+
+    def __init__(self):
+        self._nodes = {}        # имя -> список узлов с этим именем
+        self._by_ext = {}       # расширение -> множество имен
+        self._trigrams = {}     # триграмма -> множество имен
+        self._next_seq = 0
+        self._base = None       # общий индекс, поверх которого ведется этот (после VFS.fork)
+
+    def fork(self):
+        """
+        Индекс для ветви VFS
+
+        Текущее содержимое становится общей основой, новые узлы ветви попадают
+        в собственные словари. Индекс без собственных записей не наращивает цепочку
+        """
+
+        branch = NameIndex()
+        branch._base = self if self._nodes or self._base is None else self._base
+        branch._next_seq = self._next_seq
+        return branch
+
+    def add(self, node):
+        """Добавляет узел в индекс"""
+
+        node.seq = self._next_seq
+        self._next_seq += 1
+
+        name = node.name
+        nodes = self._nodes.get(name)
+        if nodes is not None:
+            nodes.append(node)
+            return
+
+        self._nodes[name] = [node]
+
+        if '.' in name:
+            ext = name.rpartition('.')[2]
+            self._by_ext.setdefault(ext, set()).add(name)
+
+        for i in range(len(name) - 2):
+            self._trigrams.setdefault(name[i:i + 3], set()).add(name)
+
+    def add_tree(self, root):
+        """Индексирует поддерево в порядке обхода (сам root не индексируется)"""
+
+        if not root.children:
+            return
+
+        stack = [iter(root.children.values())]
+        while stack:
+            for child in stack[-1]:
+                self.add(child)
+                if child.children:
+                    stack.append(iter(child.children.values()))
+                    break
+            else:
+                stack.pop()
+
+    def candidates(self, pattern, match):
+        """
+        Имена, подходящие под шаблон, либо None, если шаблон не позволяет
+        сузить поиск по индексу и нужен обход дерева
+        """
+
+        literals = [run for run in _WILDCARD_RUN.split(pattern) if run]
+        if not literals:
+            return None
+
+        if self._base is None:
+            names = self._names_for(pattern, literals)
+        else:
+            # Ветвь: объединяем имена по всей цепочке индексов
+            names = set()
+            index = self
+            while index is not None:
+                found = index._names_for(pattern, literals)
+                if found is None:
+                    return None
+                names.update(found)
+                index = index._base
+
+        return None if names is None else [name for name in names if match(name)]
+
+    def _names_for(self, pattern, literals):
+        """Имена из собственных словарей, среди которых нужно искать совпадения"""
+
+        last = literals[-1]
+        if pattern.endswith(last) and '.' in last:
+            # *.log, report*.tar.gz - отбор по расширению
+            return self._by_ext.get(last.rpartition('.')[2], ())
+
+        longest = max(literals, key=len)
+        if len(longest) < 3:
+            return None
+
+        # Пересечение множеств имен по всем триграммам самого длинного литерала
+        sets = []
+        for i in range(len(longest) - 2):
+            names_with_trigram = self._trigrams.get(longest[i:i + 3])
+            if not names_with_trigram:
+                return []
+            sets.append(names_with_trigram)
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def nodes(self, name):
+        """Узлы с данным именем"""
+
+        if self._base is None:
+            return self._nodes.get(name, ())
+
+        # Ветвь: узлы по цепочке индексов от общей основы к собственным
+        found = []
+        index = self
+        while index is not None:
+            found.append(index._nodes.get(name, ()))
+            index = index._base
+        return [node for nodes in reversed(found) for node in nodes]
+
+    def stats(self):
+        """Размеры индекса"""
+
+        return {
+            'names': len(self._nodes),
+            'extensions': len(self._by_ext),
+            'trigrams': len(self._trigrams)
+        }
@@ -0,0 +1,284 @@
+import csv
+import io
+import os
+from multiprocessing import Pool
+
+from vfs import VFS
+from vfs_content import decode_base64
+
+# Размер блока при подсчете кавычек и при поиске конца строки
+_SCAN_BLOCK = 1 << 24
+_LINE_BLOCK = 1 << 16
+
+
+def split_ranges(csv_path, data_start, parts):
+    """
+    Делит файл на диапазоны байт, границы которых совпадают с концами строк CSV
+
+    Перевод строки внутри ячейки в кавычках границей не считается: для этого
+    ведется счетчик кавычек от начала данных, граница допустима при четном числе
+    """
+
+    size = os.path.getsize(csv_path)
+    if size <= data_start or parts <= 1:
+        return [(data_start, size)]
+
+    boundaries = [data_start]
+    quotes = 0          # кавычек в [data_start, scanned)
+    scanned = data_start
+
+    with open(csv_path, 'rb') as file:
+        for part in range(1, parts):
+            target = max(data_start + (size - data_start) * part // parts, scanned)
+            position = target
+
+            while position < size:
+                file.seek(position)
+                block = file.read(_LINE_BLOCK)
+                newline = block.find(b'\n')
+                if newline == -1:
+                    position += len(block)
+                    continue
+                candidate = position + newline + 1
+
+                # Досчитываем кавычки до кандидата
+                while scanned < candidate:
+                    step = min(candidate - scanned, _SCAN_BLOCK)
+                    file.seek(scanned)
+                    quotes += file.read(step).count(b'"')
+                    scanned += step
+
+                if quotes % 2 == 0:
+                    position = candidate
+                    break
+                position = candidate
+
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def parse_range(task):
+    """
+    Разбор диапазона CSV в процессе-обработчике
+
+    Возвращает кортежи (path, type, name, content) с уже декодированным base64
+    и число пропущенных строк без обязательных полей
+    """
+
+    csv_path, start, end, columns = task
+    path_i, type_i, name_i, content_i, encoding_i, width = columns
+
+    with open(csv_path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+    if '\r' in text:
+        # Как при чтении файла в текстовом режиме
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    rows = []
+    skipped = 0
+    for row in csv.reader(io.StringIO(text)):
+        if not row:
+            continue
+        if path_i is None:
+            skipped += 1
+            continue
+        if len(row) < width:
+            row = row + [''] * (width - len(row))
+
+        content = row[content_i].strip() if content_i is not None else ''
+        if encoding_i is not None and row[encoding_i].strip() == 'base64':
+            try:
+                content = decode_base64(content)
+            except Exception as e:
+                content = f"Ошибка декодирования base64: {str(e)}"
+
+        rows.append((row[path_i].strip(), row[type_i].strip(), row[name_i].strip(), content))
+
+    return rows, skipped
+
+
+def build_range(task):
+    """
+    Разбор диапазона CSV и построение таблицы его узлов в процессе-обработчике
+
+    Строки вставляются в собственную VFS процесса тем же VFS._insert_node, что
+    и при последовательной загрузке: повторные строки, промежуточные директории
+    и конфликты типов внутри диапазона разбираются здесь. Затем узлы в порядке
+    создания выписываются в таблицу из плоских списков - имена, типы, номера
+    родителей в таблице (-1 - корень) и содержимое, - которая передается
+    из процесса намного быстрее дерева объектов. Если строки диапазона
+    конфликтуют между собой, возвращается None: какая ошибка первая, зависит
+    от уже загруженного дерева, поэтому диапазон повторяется в основном процессе
+    """
+
+    rows, skipped = parse_range(task)
+    vfs = VFS(default_structure=False)
+    vfs._begin_load(True, None)
+    stats = vfs.load_stats
+    explicit = set()    # директории, созданные строкой type=dir, а не как промежуточные
+    try:
+        for path, node_type, name, content in rows:
+            updated = stats['updated']
+            vfs._insert_node(path, node_type, name, content)
+            if node_type == "dir" and stats['updated'] == updated:
+                parts = [part for part in path.split('/') if part]
+                parts.append(name)
+                explicit.add("/" + "/".join(parts))
+    except ValueError:
+        return None
+    finally:
+        vfs._finish_load()
+
+    # Индекс путей заполняется при создании узлов, то есть родитель идет раньше потомков
+    nodes = iter(vfs._index.values())
+    positions = {id(next(nodes)): -1}   # корень диапазона соответствует корню дерева
+    names = []
+    types = []
+    parents = []
+    contents = []
+    created = set()     # номера директорий из explicit
+    for position, node in enumerate(nodes):
+        positions[id(node)] = position
+        names.append(node.name)
+        types.append(node.type)
+        parents.append(positions[id(node.parent)])
+        if node.type == "dir":
+            contents.append(None)
+            if node.path in explicit:
+                created.add(position)
+        else:
+            contents.append(node._content)
+
+    counts = {'rows': len(rows) + skipped, 'skipped': skipped,
+              'dirs': stats['dirs'], 'files': stats['files'], 'updated': stats['updated']}
+    return names, types, parents, contents, created, vfs._contents._refs, counts
+
+
+def replay_range(vfs, task):
+    """
+    Повторяет строки диапазона последовательной вставкой VFS._insert_node
+
+    Нужна, когда диапазон нельзя перенести таблицей из-за конфликта типов:
+    строки до конфликтной вставляются без ошибок, а на конфликтной
+    выбрасывается то же исключение, что и при последовательной загрузке
+    """
+
+    rows, skipped = parse_range(task)
+    stats = vfs.load_stats
+    stats['rows'] += len(rows) + skipped
+    stats['skipped'] += skipped
+    for path, node_type, name, content in rows:
+        vfs._insert_node(path, node_type, name, content)
+
+
+def merge_range(vfs, table, task):
+    """
+    Добавляет узлы таблицы диапазона task в дерево VFS
+
+    Узел создается по строке таблицы через VFS._new_node и подключается к
+    родителю, взятому по номеру, через VFS._link. Совпадения с уже загруженными
+    узлами возможны только у потомков директорий, которые были в дереве раньше;
+    для них счетчики и содержимое исправляются так, как это сделала бы
+    последовательная загрузка (повторная строка - обновление узла). При
+    конфликте типов строки диапазона повторяются последовательно (replay_range),
+    чтобы ошибка не зависела от числа процессов загрузки
+    """
+
+    names, types, parents, contents, created, refs, counts = table
+    stats = vfs.load_stats
+    for key, value in counts.items():
+        stats[key] += value
+
+    # Одинаковое содержимое разных диапазонов - одна строка на все узлы
+    store = vfs._contents
+    replaced = store.merge(refs)
+
+    root = vfs.root
+    new_node = vfs._new_node
+    link = vfs._link
+    nodes = []      # узел дерева для каждой строки таблицы
+    fresh = []      # узел создан этой таблицей, поэтому у его потомков совпадений нет
+    merged_dirs = 0
+    merged_files = 0
+    position = -1
+    for name, node_type, parent_position, content in zip(names, types, parents, contents):
+        position += 1
+        if parent_position < 0:
+            parent = root
+            check = True
+        else:
+            parent = nodes[parent_position]
+            check = not fresh[parent_position]
+        if replaced and content is not None:
+            content = replaced.get(content, content)
+
+        if check and parent.children:
+            existing = parent.children.get(name)
+            if existing is not None:
+                if existing.type != node_type:
+                    replay_range(vfs, task)
+                    raise ValueError(f"Конфликт типов для {existing.path}")
+                if node_type == "dir":
+                    merged_dirs += 1
+                    if position in created:
+                        stats['updated'] += 1
+                else:
+                    merged_files += 1
+                    store.release(existing._content)
+                    existing.content = content
+                nodes.append(existing)
+                fresh.append(False)
+                continue
+
+        node = new_node(name, node_type, content)
+        link(parent, node)
+        nodes.append(node)
+        fresh.append(True)
+
+    # Совпавшие узлы последовательная загрузка не создала бы, а файлы обновила бы
+    stats['dirs'] -= merged_dirs
+    stats['files'] -= merged_files
+    stats['updated'] += merged_files
+
+
+def load_rows_parallel(vfs, csv_path, workers):
+    """
+    Загружает строки CSV в VFS, разбирая их в пуле процессов
+
+    Процессы не только разбирают и декодируют строки, но и строят по ним
+    поддерево своего диапазона и возвращают таблицу его узлов; основному
+    процессу остается создать узлы по таблицам в порядке диапазонов
+    (merge_range). Правила конфликтов и обновления существующих узлов те же,
+    что и при последовательной загрузке
+    """
+
+    with open(csv_path, 'rb') as file:
+        header_line = file.readline()
+    data_start = len(header_line)
+    header = next(csv.reader([header_line.decode('utf-8').rstrip('\r\n')]), None)
+    if not header:
+        return
+
+    indices = {name: index for index, name in enumerate(header)}
+    if 'path' in indices and 'type' in indices and 'name' in indices:
+        columns = (indices['path'], indices['type'], indices['name'],
+                   indices.get('content'), indices.get('encoding'), len(header))
+    else:
+        columns = (None, None, None, None, None, len(header))
+
+    # Диапазонов больше, чем процессов, чтобы перенос таблиц в дерево шел параллельно с их построением
+    ranges = split_ranges(csv_path, data_start, workers * 4)
+    tasks = [(csv_path, start, end, columns) for start, end in ranges]
+
+    with Pool(workers) as pool:
+        for task, table in zip(tasks, pool.imap(build_range, tasks)):
+            if table is None:
+                replay_range(vfs, task)
+            else:
+                merge_range(vfs, table, task)
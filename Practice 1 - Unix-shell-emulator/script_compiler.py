@@ -0,0 +1,132 @@
+"""
+Компиляция .vsh-скриптов
+
+Скрипт разбирается один раз: пустые строки и комментарии отбрасываются, строки
+без переменных окружения сразу делятся на команду и аргументы. Строки с $
+помечаются и разбираются parse_command при выполнении, чтобы подставлялись
+текущие значения переменных. Результат кэшируется в памяти и, при заданном
+каталоге, на диске; ключ - путь скрипта, mtime и размер файла
+"""
+
+import os
+
+CACHE_VERSION = 1
+
+
+class ScriptCommand:
+    """Строка скрипта, готовая к выполнению"""
+
+    __slots__ = ('line', 'command', 'args', 'expand')
+
+    def __init__(self, line, command, args, expand):
+        self.line = line          # текст строки, выводится как ввод пользователя
+        self.command = command    # имя команды (для expand=True - None)
+        self.args = args          # аргументы (для expand=True - None)
+        self.expand = expand      # строку нужно разбирать при выполнении
+
+
+def compile_lines(lines):
+    """Превращает строки скрипта в список ScriptCommand"""
+
+    commands = []
+    for line in lines:
+        line = line.strip()
+
+        # Пропускаем пустые строки и комментарии
+        if not line or line.startswith('#'):
+            continue
+
+        if '$' in line:
+            commands.append(ScriptCommand(line, None, None, True))
+        else:
+            parts = line.split()
+            commands.append(ScriptCommand(line, parts[0], parts[1:], False))
+    return commands
+
+
+class ScriptCache:
+    """Кэш скомпилированных скриптов: в памяти и, если задан cache_dir, на диске"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._scripts = {}      # путь -> (stamp, список ScriptCommand)
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, script_path):
+        """Скомпилированный скрипт; перекомпилируется, если файл изменился"""
+
+        info = os.stat(script_path)
+        stamp = (info.st_mtime_ns, info.st_size)
+
+        cached = self._scripts.get(script_path)
+        if cached is not None and cached[0] == stamp:
+            self.hits += 1
+            return cached[1]
+
+        commands = self._read_disk(script_path, stamp)
+        if commands is None:
+            self.misses += 1
+            with open(script_path, 'r', encoding='utf-8') as file:
+                commands = compile_lines(file)
+            self._write_disk(script_path, stamp, commands)
+        else:
+            self.hits += 1
+
+        self._scripts[script_path] = (stamp, commands)
+        return commands
+
+    def _disk_path(self, script_path):
+        import hashlib  # нужен только дисковому кэшу
+        digest = hashlib.sha1(os.path.abspath(script_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.vshc")
+
+    def _read_disk(self, script_path, stamp):
+        if not self.cache_dir:
+            return None
+
+        import json
+
+        try:
+            with open(self._disk_path(script_path), 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('version') != CACHE_VERSION or tuple(data.get('stamp', ())) != stamp:
+            return None
+        return [ScriptCommand(*item) for item in data['commands']]
+
+    def _write_disk(self, script_path, stamp, commands):
+        if not self.cache_dir:
+            return
+
+        import json
+
+        data = {
+            'version': CACHE_VERSION,
+            'script': script_path,
+            'stamp': list(stamp),
+            'commands': [[c.line, c.command, c.args, c.expand] for c in commands]
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._disk_path(script_path)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # дисковый кэш необязателен
+
+
+_caches = {}
+
+
+def shared_cache(cache_dir=None):
+    """Общий кэш процесса для каталога cache_dir (None - только в памяти)"""
+
+    cache = _caches.get(cache_dir)
+    if cache is None:
+        cache = _caches[cache_dir] = ScriptCache(cache_dir)
+    return cache
@@ -1,59 +1,93 @@
 import os
+import time
+
+from cancellation import CommandCancelled
+from script_compiler import shared_cache
 
 
 class ScriptRunner:
-    """Класс для выполнения скриптов"""
+    """
+    Класс для выполнения скриптов
+
+    gui - любой приемник вывода с методами print_output и update_prompt:
+    графический интерфейс ShellGUI или StreamOutput режима --headless
+    """
 
-    def __init__(self, shell_core, gui):
+    def __init__(self, shell_core, gui, cache=None):
         self.shell = shell_core
         self.gui = gui
+        # Скомпилированные скрипты общие для всех ScriptRunner процесса
+        self.cache = cache or shared_cache(shell_core.config.script_cache_dir)
+
+    def run_script(self, script_path, cancel=None):
+        """
+        Выполнение скрипта
+
+        Возвращает статистику прогона: число выполненных команд, число команд,
+        завершившихся исключением, время в секундах и признак успешного завершения.
+        cancel - CancelToken окна: прерванный скрипт завершается исключением CommandCancelled
+        """
 
-    def run_script(self, script_path):
-        """Выполнение скрипта"""
+        stats = {'script': script_path, 'commands': 0, 'errors': 0, 'seconds': 0.0, 'ok': False}
+        started = time.perf_counter()
+        errors_before = self.shell.command_errors
 
         if not script_path or not os.path.exists(script_path):
             error_msg = f"Ошибка: файл скрипта не найден - {script_path}\n"
             self.gui.print_output(error_msg)
-            return
+            return stats
 
         try:
-            with open(script_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
+            script = self.cache.load(script_path)
 
             # Выводим информацию о запуске скрипта
             self.gui.print_output(f"Выполнение скрипта: {script_path}\n")
             self.gui.print_output("------------------------------\n")
 
-            # Выполняем каждую строку скрипта
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
-
-                # Пропускаем пустые строки и комментарии
-                if not line or line.startswith('#'):
-                    continue
+            # Поиск методов вынесен из цикла
+            print_output = self.gui.print_output
+            update_prompt = self.gui.update_prompt
+            parse_command = self.shell.parse_command
+            execute_stream = self.shell.execute_stream
+            vfs = self.shell.vfs
 
+            # Выполняем каждую команду скрипта
+            for item in script:
                 # Выводим команду (имитируем ввод пользователя)
-                current_path = self.shell.vfs.get_current_path()
-                vfs_name = self.shell.vfs.name
-                self.gui.print_output(f"{vfs_name}:{current_path}$ {line}\n")
+                print_output(f"{vfs.name}:{vfs.get_current_path()}$ {item.line}\n")
 
-                # Выполняем команду
-                command, args = self.shell.parse_command(line)
-                result = self.shell.execute(command, args)
+                # Строки с переменными окружения разбираются при выполнении
+                if item.expand:
+                    command, args = parse_command(item.line)
+                else:
+                    command, args = item.command, item.args
 
-                # Выводим результат
-                if result and result != "EXIT":
-                    self.gui.print_output(f"{result}\n")
+                # Выполняем команду, выводя результат по мере готовности
+                stats['commands'] += 1
+                exit_requested = False
+                for result in execute_stream(command, args, cancel):
+                    if result == "EXIT":
+                        exit_requested = True
+                    else:
+                        print_output(f"{result}\n")
 
-                self.gui.update_prompt()
+                update_prompt()
 
                 # Если команда exit - прерываем выполнение скрипта
-                if result == "EXIT":
-                    self.gui.print_output("Завершение работы по команде exit\n")
+                if exit_requested:
+                    print_output("Завершение работы по команде exit\n")
                     break
 
             self.gui.print_output(f"Скрипт завершен\n\n")
+            stats['ok'] = True
+
+        except CommandCancelled:
+            raise
 
         except Exception as e:
             error_msg = f"Ошибка выполнения скрипта: {str(e)}\n"
-            self.gui.print_output(error_msg)
\ No newline at end of file
+            self.gui.print_output(error_msg)
+
+        stats['errors'] = self.shell.command_errors - errors_before
+        stats['seconds'] = time.perf_counter() - started
+        return stats
\ No newline at end of file
@@ -0,0 +1,145 @@
+import asyncio
+import contextlib
+import copy
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cancellation import CancelToken
+from shell_core import ShellCore
+
+
+class ShellServer:
+    """
+    Многосеансовый сервер оболочки на asyncio
+
+    Все сеансы работают с одним загруженным деревом VFS: каждое подключение
+    получает собственный ShellCore поверх VFS.session() со своей текущей
+    директорией. Протокол строковый: клиент присылает команду, сервер отвечает
+    ее выводом и приглашением, как в окне эмулятора.
+
+    Команды выполняются не в цикле событий, а в одном рабочем потоке: цикл
+    продолжает принимать подключения и отправлять вывод, пока команда работает,
+    а дерево по-прежнему изменяет и читает только один поток. Вывод команды
+    набирается пачками, ограниченными размером и временем, после каждой пачки
+    поток переходит к командам других сеансов
+    """
+
+    CHUNK_BYTES = 1 << 16       # вывод команды отправляется пачками такого размера
+    CHUNK_SECONDS = 0.02        # пачка отдается не позже, чем через столько секунд
+    WRITE_BUFFER = 1 << 18      # предел буфера отправки сеанса, после него drain ждет клиента
+    LINE_LIMIT = 1 << 16        # наибольшая длина строки команды
+
+    def __init__(self, vfs, config):
+        self.vfs = vfs
+        self.config = copy.copy(config)
+        # Пул grep -r создается через fork: в процессе сервера он копировал бы
+        # все сеансы и сокеты, поэтому grep здесь работает в одном процессе
+        self.config.grep_workers = 1
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shell")
+        self.active = 0         # открытые сеансы
+        self.total = 0          # сеансов за время работы сервера
+
+    async def handle_session(self, reader, writer):
+        """Обслуживание одного подключения"""
+
+        vfs = self.vfs.session()
+        shell = ShellCore(vfs, self.config)
+        cancel = CancelToken()  # отменяет выполняемую команду при разрыве соединения
+
+        self.active += 1
+        self.total += 1
+        writer.transport.set_write_buffer_limits(high=self.WRITE_BUFFER)
+
+        try:
+            writer.write(f"Добро пожаловать в эмулятор командной строки {vfs.name}!\n".encode('utf-8'))
+            while True:
+                writer.write(f"{vfs.name}:{vfs.get_current_path()}$ ".encode('utf-8'))
+                await writer.drain()
+
+                line = await reader.readline()
+                if not line:
+                    break
+
+                command, args = shell.parse_command(line.decode('utf-8', errors='replace').strip())
+                if await self.run_command(shell, command, args, writer, cancel):
+                    break
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError):
+            pass  # клиент отключился или прислал слишком длинную строку
+        finally:
+            cancel.cancel()
+            self.active -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def run_command(self, shell, command, args, writer, cancel):
+        """
+        Выполняет команду и отправляет ее вывод
+
+        Очередная пачка вывода набирается в рабочем потоке, затем отправляется,
+        и drain ждет, пока клиент заберет данные: медленный клиент не копит вывод
+        в памяти сервера. Возвращает True для команды exit
+        """
+
+        loop = asyncio.get_running_loop()
+        results = shell.execute_stream(command, args, cancel)
+        while True:
+            batch, finished = await loop.run_in_executor(self.executor, self._next_batch, results)
+            if batch is None:
+                return True
+            if batch:
+                writer.write(("\n".join(batch) + "\n").encode('utf-8'))
+                await writer.drain()
+            if finished:
+                return False
+
+    def _next_batch(self, results):
+        """
+        Следующая пачка строк вывода (в рабочем потоке) и признак конца вывода
+
+        Пачка заканчивается на CHUNK_BYTES символах или через CHUNK_SECONDS, даже если
+        команда выводит мало; для команды exit вместо пачки возвращается None
+        """
+
+        batch = []
+        size = 0
+        deadline = time.perf_counter() + self.CHUNK_SECONDS
+        for result in results:
+            if result == "EXIT":
+                return None, True
+
+            batch.append(result)
+            size += len(result) + 1
+            if size >= self.CHUNK_BYTES or time.perf_counter() >= deadline:
+                return batch, False
+        return batch, True
+
+    async def serve(self, address):
+        """Запускает сервер: address - "host:port", "port" или "unix:/путь/к/сокету" """
+
+        if address.startswith("unix:"):
+            server = await asyncio.start_unix_server(self.handle_session, address[len("unix:"):],
+                                                     limit=self.LINE_LIMIT, backlog=1024)
+        else:
+            host, _, port = address.rpartition(":")
+            server = await asyncio.start_server(self.handle_session, host or "127.0.0.1", int(port),
+                                                limit=self.LINE_LIMIT, backlog=1024)
+
+        listening = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Сервер оболочки слушает {listening}", file=sys.stderr)
+
+        async with server:
+            await server.serve_forever()
+
+
+def run_server(vfs, config):
+    """Запускает сервер до прерывания по Ctrl+C"""
+
+    server = ShellServer(vfs, config)
+    try:
+        asyncio.run(server.serve(config.serve_address))
+    except KeyboardInterrupt:
+        print(f"Сервер остановлен, обслужено сеансов: {server.total}", file=sys.stderr)
+    finally:
+        server.executor.shutdown(wait=False, cancel_futures=True)
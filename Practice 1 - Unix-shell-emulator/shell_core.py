@@ -1,7 +1,126 @@
 import os
 import re
-import datetime
+import sys
+import threading
+from collections import OrderedDict
 from config import Config
+from cancellation import CommandCancelled
+from content_search import search_files
+from vfs_content import LazyContent
+
+# Переменные окружения в формате $VAR или ${VAR}
+ENV_VAR_PATTERN = re.compile(r'\$([a-zA-Z_][a-zA-Z0-9_]*)|\$\{([a-zA-Z_][a-zA-Z0-9_]*)\}')
+
+# Разделитель стадий конвейера
+PIPE = '|'
+
+# Результаты длиннее этого числа строк в кэш не попадают
+RESULT_CACHE_MAX_LINES = 10000
+
+
+class ResultBudget:
+    """
+    Общий предел памяти кэшей результатов нескольких оболочек
+
+    Каждый сеанс сервера и каждая ветвь пакетного прогона заводят свой ShellCore.
+    Записи всех их кэшей стоят в одной очереди LRU: при превышении предела
+    вытесняются самые давние, в каком бы кэше они ни лежали. Сеансы сервера
+    работают в разных потоках, поэтому все изменения кэшей идут под блокировкой
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._entries = OrderedDict()   # (id кэша, ключ) -> (кэш, байт), от давних к свежим
+        self._lock = threading.Lock()
+
+    def get(self, results, key):
+        """Строки результата из кэша results или None"""
+
+        with self._lock:
+            lines = results.get(key)
+            if lines is not None:
+                results.move_to_end(key)
+                self._entries.move_to_end((id(results), key))
+            return lines
+
+    def put(self, results, key, lines, max_entries):
+        """Сохраняет результат в кэш results не больше чем на max_entries записей"""
+
+        size = sum(map(sys.getsizeof, lines)) + 8 * len(lines)  # строки и ссылки на них
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(results, key)
+            results[key] = lines
+            self._entries[(id(results), key)] = (results, size)
+            self.used += size
+            if len(results) > max_entries:
+                self._discard(results, next(iter(results)))
+            while self.used > self.max_bytes:
+                (_, old_key), (owner, old_size) = self._entries.popitem(last=False)
+                del owner[old_key]
+                self.used -= old_size
+
+    def _discard(self, results, key):
+        entry = self._entries.pop((id(results), key), None)
+        if entry is not None:
+            del results[key]
+            self.used -= entry[1]
+
+
+_budgets = {}
+
+
+def shared_budget(max_bytes):
+    """Общий предел процесса для кэшей с пределом max_bytes"""
+
+    budget = _budgets.get(max_bytes)
+    if budget is None:
+        budget = _budgets[max_bytes] = ResultBudget(max_bytes)
+    return budget
+
+
+def iter_lines(text):
+    """Строки текста по одной, как text.split('\\n'), но без построения списка"""
+
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_content_lines(node):
+    """
+    Строки содержимого файла по одной
+
+    Ленивое содержимое читается из отображенного образа по частям и в узле не
+    сохраняется, поэтому память не зависит от размера файла
+    """
+
+    content = node._content
+    if content.__class__ is LazyContent:
+        return content.source.iter_lines(content)
+    return iter_lines(content or "")
+
+
+def iter_text_lines(node):
+    """
+    Строки файла для grep и wc, как content_search.split_lines: завершающий
+    перевод строки не дает лишней пустой строки, у пустого файла строк нет
+    """
+
+    lines = iter_content_lines(node)
+    previous = next(lines)  # iter_content_lines выдает хотя бы одну строку
+    for line in lines:
+        yield previous
+        previous = line
+    if previous:
+        yield previous
 
 
 class ShellCore:
@@ -19,20 +138,54 @@ class ShellCore:
             'find': self.cmd_find,
             'rev': self.cmd_rev,
             'who': self.cmd_who,
-            'mkdir': self.cmd_mkdir
+            'mkdir': self.cmd_mkdir,
+            'du': self.cmd_du,
+            'tree': self.cmd_tree,
+            'grep': self.cmd_grep,
+            'wc': self.cmd_wc,
+            'cat': self.cmd_cat
+        }
+        self.stream_commands = {    # команды, умеющие выдавать результат построчно
+            'echo': self.stream_echo,
+            'ls': self.stream_ls,
+            'find': self.stream_find,
+            'rev': self.stream_rev,
+            'who': self.stream_who,
+            'du': self.stream_du,
+            'tree': self.stream_tree,
+            'grep': self.stream_grep,
+            'wc': self.stream_wc,
+            'cat': self.stream_cat
         }
+        # Потоковые команды, читающие строки предыдущей стадии конвейера
+        self.filter_commands = {'rev', 'grep', 'wc', 'cat'}
+        # Команды, вывод которых зависит только от аргументов, текущей директории и дерева.
+        # rev и cat сюда не входят: они выводят содержимое файлов целиком, и кэш держал
+        # бы в памяти копию каждого прочитанного файла
+        self.pure_commands = {'ls', 'find', 'du', 'tree', 'grep', 'wc'}
+
+        # LRU результатов чистых команд: (команда, аргументы, директория, версия VFS) -> строки;
+        # память всех кэшей процесса ограничена общим пределом
+        self._results = OrderedDict()
+        self.result_cache_size = config.result_cache
+        self._budget = shared_budget(config.result_cache_mb << 20)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.command_errors = 0     # число команд, завершившихся исключением
 
     def _expand_env_vars(self, text):
         """Раскрытие переменных окружения в формате $VAR или ${VAR}"""
 
+        # Без символа $ подставлять нечего
+        if '$' not in text:
+            return text
+
         def replace_var(match):
             var_name = match.group(1) or match.group(2)  # группа 1 - $HOME, группа 2 - ${HOME}; берем что-то одно
             return os.getenv(var_name, '')
 
-        # Регуляное выражение для обработки $VAR или ${VAR}
-        pattern = r'\$([a-zA-Z_][a-zA-Z0-9_]*)|\$\{([a-zA-Z_][a-zA-Z0-9_]*)\}'
-        return re.sub(
-            pattern,        # шаблон, вхождение которого нужно заменить
+        # Регулярное выражение скомпилировано один раз на уровне модуля
+        return ENV_VAR_PATTERN.sub(
             replace_var,    # функция, производящая замену
             text            # строка, для которой производится замена
         )
@@ -53,32 +206,236 @@ class ShellCore:
 
         return command, args
 
+    def _result_key(self, command, args):
+        """
+        Ключ кэша результата или None, если команду кэшировать нельзя
+
+        Относительные пути разрешаются от текущей директории, поэтому она входит
+        в ключ; любое изменение дерева увеличивает vfs.generation, и старые ключи
+        больше не совпадают
+        """
+
+        if not self.result_cache_size or command not in self.pure_commands:
+            return None
+        return command, tuple(args), self.vfs.get_current_path(), self.vfs.generation
+
+    def _cached_result(self, key):
+        """Строки результата из кэша или None"""
+
+        lines = self._budget.get(self._results, key)
+        if lines is None:
+            self.cache_misses += 1
+            return None
+        self.cache_hits += 1
+        return lines
+
+    def _store_result(self, key, lines):
+        """Сохраняет результат, если дерево не изменилось за время выполнения команды"""
+
+        if key[3] != self.vfs.generation:
+            return
+        self._budget.put(self._results, key, tuple(lines), self.result_cache_size)
+
+    def _command_error(self, command, error):
+        """Сообщение об исключении команды; такие команды подсчитываются"""
+
+        self.command_errors += 1
+        return f"Ошибка выполнения команды {command}: {str(error)}"
+
+    def cache_info(self):
+        """Статистика кэша результатов"""
+
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'cached': len(self._results),
+            'cache_size': self.result_cache_size,
+            'budget_used': self._budget.used,
+            'budget_bytes': self._budget.max_bytes
+        }
+
     def execute(self, command, args):
-        """Выполнение команды"""
+        """Выполнение команды; аргумент | делит ее на стадии конвейера, как в execute_stream"""
+
+        if command == PIPE or PIPE in args:
+            return '\n'.join(self.execute_pipeline([command] + args))
+
+        key = self._result_key(command, args)
+        if key is not None:
+            lines = self._cached_result(key)
+            if lines is not None:
+                return '\n'.join(lines)
+            try:
+                lines = list(self.stream_commands[command](args))
+            except CommandCancelled:
+                raise
+            except Exception as e:
+                return self._command_error(command, e)
+            if len(lines) <= RESULT_CACHE_MAX_LINES:
+                self._store_result(key, lines)
+            return '\n'.join(lines)
 
         if command in self.commands:
             try:
                 return self.commands[command](args)
+            except CommandCancelled:
+                raise
             except Exception as e:
-                return f"Ошибка выполнения команды {command}: {str(e)}"
+                return self._command_error(command, e)
         elif command:
             return f"Команда не найдена: {command}"
         else:
             return ""
 
+    def execute_stream(self, command, args, cancel=None):
+        """
+        Выполнение команды с построчной выдачей результата
+
+        Потоковые команды отдают строки по мере готовности, для остальных
+        результат execute выдается целиком одним фрагментом. Аргумент | делит
+        команду на стадии конвейера. cancel (CancelToken) передается потоковой
+        команде; после отмены выдача прекращается исключением CommandCancelled
+        """
+
+        if command == PIPE or PIPE in args:
+            yield from self.execute_pipeline([command] + args, cancel)
+            return
+
+        stream = self.stream_commands.get(command)
+        if stream is None:
+            result = self.execute(command, args)
+            if result:
+                yield result
+            return
+
+        key = self._result_key(command, args)
+        if key is not None:
+            lines = self._cached_result(key)
+            if lines is not None:
+                yield from lines
+                return
+            lines = []
+
+        try:
+            if key is None:
+                yield from stream(args, cancel)
+                return
+
+            # Строки выдаются сразу и заодно собираются для кэша, пока их не слишком много
+            for line in stream(args, cancel):
+                if lines is not None:
+                    lines.append(line)
+                    if len(lines) > RESULT_CACHE_MAX_LINES:
+                        lines = None
+                yield line
+        except CommandCancelled:
+            raise
+        except Exception as e:
+            yield self._command_error(command, e)
+            return
+
+        if lines is not None:
+            self._store_result(key, lines)
+
+    def execute_pipeline(self, words, cancel=None):
+        """
+        Конвейер: cmd1 args | cmd2 args | ...
+
+        Стадии связаны генераторами: строка попадает в следующую стадию сразу,
+        как только ее выдала предыдущая, промежуточные результаты не собираются
+        """
+
+        stages = [[]]
+        for word in words:
+            if word == PIPE:
+                stages.append([])
+            else:
+                stages[-1].append(word)
+
+        if not all(stages):
+            yield "Синтаксическая ошибка: пустая команда в конвейере"
+            return
+
+        lines = None
+        for stage in stages:
+            lines = self._pipeline_stage(stage[0], stage[1:], lines, cancel)
+
+        yield from lines
+
+    def _pipeline_stage(self, command, args, stdin, cancel):
+        """Одна стадия конвейера; stdin - строки предыдущей стадии или None для первой"""
+
+        if stdin is not None and command not in self.filter_commands:
+            # Команда не читает ввод: предыдущие стадии выполняются ради побочных эффектов
+            for _ in stdin:
+                pass
+            stdin = None
+
+        stream = self.stream_commands.get(command)
+        if stream is None:
+            result = self.execute(command, args)
+            # exit в конвейере, как в подоболочке, оболочку не завершает
+            if result and result != "EXIT":
+                yield from iter_lines(result)
+            return
+
+        try:
+            if command in self.filter_commands:
+                yield from stream(args, cancel, stdin)
+            else:
+                yield from stream(args, cancel)
+        except CommandCancelled:
+            raise
+        except Exception as e:
+            yield self._command_error(command, e)
+
 
     """Область разработки команд"""
 
     def cmd_ls(self, args):
         """Команда ls - список файлов и директорий"""
 
-        path = args[0] if args else None
-
-        success, result = self.vfs.list_directory(path)
-        if success:
-            return result
+        return '\n'.join(self.stream_ls(args))
+
+    def stream_ls(self, args, cancel=None):
+        """Потоковый ls: имена выдаются по одному; ls -R [путь] - рекурсивно"""
+
+        if '-R' in args:
+            rest = [arg for arg in args if arg != '-R']
+            path = rest[0] if rest else None
+            lines = self.vfs.iter_listing_recursive(path, cancel)
+            if lines is None:
+                yield f"ls: Директория не найдена: {path}"
+                return
+            yield from lines
+            return
+
+        # Постраничный вывод: ls [путь] --limit N --offset M
+        page = {'--limit': None, '--offset': 0}
+        rest = []
+        i = 0
+        while i < len(args):
+            if args[i] in page and i + 1 < len(args):
+                if not args[i + 1].isdigit():
+                    yield f"ls: неверное значение {args[i]}: {args[i + 1]}"
+                    return
+                page[args[i]] = int(args[i + 1])
+                i += 2
+            else:
+                rest.append(args[i])
+                i += 1
+
+        path = rest[0] if rest else None
+
+        success, result = self.vfs.directory_entries(path, page['--offset'], page['--limit'])
+        if not success:
+            yield f"ls: {result}"
+        elif not result:
+            # Пустая страница непустой директории ничего не выводит
+            if page['--offset'] == 0 and page['--limit'] != 0:
+                yield "Директория пуста"
         else:
-            return f"ls: {result}"
+            yield from result
 
     def cmd_cd(self, args):
         """Команда cd - смена директории"""
@@ -99,42 +456,93 @@ class ShellCore:
     def cmd_echo(self, args):
         """Команда echo - вывод текста в консоль"""
 
+        return '\n'.join(self.stream_echo(args))
+
+    def stream_echo(self, args, cancel=None):
+        """Потоковый echo"""
+
         if not args:
-            return ""
+            return
 
         text = " ".join(args)
 
         # Раскрываем переменные окружения
         expanded_text = self._expand_env_vars(text)
-        return expanded_text
+        if expanded_text:
+            yield from iter_lines(expanded_text)
     
     def cmd_find(self, args):
         """Команда find - поиск файлов и директорий по имени"""
 
-        if not args:
-            return "find: отсутствуют аргументы. Использование: find <путь> -name <шаблон>"
+        return '\n'.join(self.stream_find(args))
 
-        # Базовая реализация: find <путь> -name <шаблон>
-        if len(args) < 3 or args[1] != "-name":
-            return "find: поддерживается только форма: find <путь> -name <шаблон>"
+    def stream_find(self, args, cancel=None):
+        """
+        Потоковый find: find <путь> -name <шаблон> [-type f|d] [-maxdepth N]
 
-        search_path = args[0]
-        pattern = args[2]
+        Пути выдаются по мере обхода дерева, а не после его завершения
+        """
 
-        results = self.vfs.find_files(search_path, pattern)
+        if not args:
+            yield "find: отсутствуют аргументы. Использование: find <путь> -name <шаблон>"
+            return
+
+        search_path = args[0]
+        options = {}
+        i = 1
+        while i < len(args):
+            option = args[i]
+            if option not in ('-name', '-type', '-maxdepth') or i + 1 >= len(args):
+                options = None
+                break
+            options[option] = args[i + 1]
+            i += 2
+
+        # Базовая форма: find <путь> -name <шаблон>
+        if options is None or '-name' not in options:
+            yield "find: поддерживается только форма: find <путь> -name <шаблон>"
+            return
+
+        node_type = None
+        if '-type' in options:
+            node_type = {'f': "file", 'd': "dir"}.get(options['-type'])
+            if node_type is None:
+                yield f"find: неизвестный тип: {options['-type']}. Допустимо: f, d"
+                return
+
+        max_depth = None
+        if '-maxdepth' in options:
+            if not options['-maxdepth'].isdigit():
+                yield f"find: неверное значение -maxdepth: {options['-maxdepth']}"
+                return
+            max_depth = int(options['-maxdepth'])
+
+        results = self.vfs.iter_find(search_path, options['-name'], node_type, max_depth, cancel)
         if results is None:
-            return f"find: {search_path}: директория не найдена"
+            yield f"find: {search_path}: директория не найдена"
+            return
 
-        if not results:
-            return ""  # ничего не найдено
+        yield from results
 
-        return '\n'.join(results)
-    
     def cmd_rev(self, args):
         """Команда rev - переворачивает строки или содержимое файла"""
 
+        return '\n'.join(self.stream_rev(args))
+
+    def stream_rev(self, args, cancel=None, stdin=None):
+        """
+        Потоковый rev: строки переворачиваются и выдаются по одной
+
+        Без аргументов в конвейере переворачивает строки предыдущей стадии
+        """
+
         if not args:
-            return "rev: отсутствуют аргументы. Использование: rev <файл> или rev <текст>"
+            if stdin is not None:
+                for line in stdin:
+                    yield line[::-1]
+                return
+            yield "rev: отсутствуют аргументы. Использование: rev <файл> или rev <текст>"
+            return
 
         # Если первый аргумент существует как файл в VFS, читаем его содержимое
         filename = args[0]
@@ -142,22 +550,32 @@ class ShellCore:
 
         if file_node is not None and file_node.type == "file":
             # Работа с файлом
-            content = file_node.content or ""
-            if not content:
-                return ""  # пустой файл
-
-            # Переворачиваем каждую строку отдельно
-            lines = content.split('\n')
-            reversed_lines = [line[::-1] for line in lines]  # переворачиваем каждую строку
-            return '\n'.join(reversed_lines)
+            if not file_node._content:
+                return  # пустой файл
+
+            # Переворачиваем каждую строку отдельно, не держа в памяти все содержимое
+            for line in iter_content_lines(file_node):
+                if cancel is not None:
+                    cancel.check()
+                yield line[::-1]
         else:
             # Работа с текстом из аргументов
             text = " ".join(args)
             # Переворачиваем весь текст
-            return text[::-1]
+            yield text[::-1]
     
     def cmd_who(self, args):
         """Команда who - отображает информацию о текущих пользователях"""
+
+        return '\n'.join(self.stream_who(args))
+
+    def stream_who(self, args, cancel=None):
+        """Потоковый who"""
+
+        yield from iter_lines(self._who_info())
+
+    def _who_info(self):
+        """Текст вывода команды who"""
         
         # В нашей виртуальной системе имитируем информацию о пользователях
         # В реальной системе эта команда показывает кто залогинен в системе
@@ -180,9 +598,61 @@ class ShellCore:
     def _get_current_time(self):
         """Вспомогательная функция для получения текущего времени (имитация)"""
 
+        import datetime  # нужен только who
         now = datetime.datetime.now()
         return now.strftime("%Y-%m-%d %H:%M:%S")
     
+    def cmd_du(self, args):
+        """Команда du - размер директорий в байтах"""
+
+        return '\n'.join(self.stream_du(args))
+
+    def stream_du(self, args, cancel=None):
+        """
+        Потоковый du [-s] [путь]
+
+        Размеры берутся из агрегатов директорий, поэтому du -s стоит O(1),
+        а полный вывод - один проход по директориям без обхода файлов
+        """
+
+        summarize = '-s' in args
+        rest = [arg for arg in args if arg != '-s']
+        path = rest[0] if rest else None
+
+        if summarize:
+            success, result = self.vfs.subtree_stats(path)
+            if not success:
+                yield f"du: {result}"
+                return
+            yield f"{result[2]}\t{path or '.'}"
+            return
+
+        sizes = self.vfs.iter_du(path, cancel)
+        if sizes is None:
+            yield f"du: Путь не найден: {path}"
+            return
+        for size, dir_path in sizes:
+            yield f"{size}\t{dir_path}"
+
+    def cmd_tree(self, args):
+        """Команда tree - дерево директории"""
+
+        return '\n'.join(self.stream_tree(args))
+
+    def stream_tree(self, args, cancel=None):
+        """Потоковый tree [путь]: итоговые счетчики берутся из агрегатов"""
+
+        path = args[0] if args else None
+        lines = self.vfs.iter_tree(path, cancel)
+        if lines is None:
+            yield f"tree: Директория не найдена: {path}"
+            return
+
+        yield from lines
+        success, (files, dirs, size) = self.vfs.subtree_stats(path)
+        yield ""
+        yield f"Директорий: {dirs}, файлов: {files}"
+
     def cmd_mkdir(self, args):
         """Команда mkdir - создание директорий"""
 
@@ -190,4 +660,159 @@ class ShellCore:
             return "mkdir: отсутствует аргумент - имя директории"
 
         success, message = self.vfs.create_directory(args[0])
-        return message if success else f"mkdir: {message}"
\ No newline at end of file
+        return message if success else f"mkdir: {message}"
+
+    def cmd_grep(self, args):
+        """Команда grep - поиск строк по регулярному выражению"""
+
+        return '\n'.join(self.stream_grep(args))
+
+    def stream_grep(self, args, cancel=None, stdin=None):
+        """
+        Потоковый grep [-r] [-c] <шаблон> [путь]
+
+        Для файла выдаются совпавшие строки, с -c - их число. С -r просматриваются
+        все файлы поддерева в порядке путей, строки выводятся как "путь:строка";
+        большие поддеревья обрабатываются пулом процессов (content_search).
+        Без пути в конвейере фильтрует строки предыдущей стадии
+        """
+
+        flags = [arg for arg in args if arg.startswith('-') and len(arg) > 1]
+        rest = [arg for arg in args if not (arg.startswith('-') and len(arg) > 1)]
+        for flag in flags:
+            if flag not in ('-r', '-c'):
+                yield f"grep: неизвестный параметр: {flag}"
+                return
+        recursive = '-r' in flags
+        count_only = '-c' in flags
+
+        if not rest or (len(rest) == 1 and stdin is None):
+            yield "grep: отсутствуют аргументы. Использование: grep [-r] [-c] <шаблон> <путь>"
+            return
+
+        try:
+            regex = re.compile(rest[0])
+        except re.error as e:
+            yield f"grep: неверное регулярное выражение: {e}"
+            return
+
+        if len(rest) == 1:
+            matches = filter(regex.search, stdin)
+            if count_only:
+                yield str(sum(1 for _ in matches))
+            else:
+                yield from matches
+            return
+
+        path = rest[1]
+        node = self.vfs.get_node(path)
+        if node is None:
+            yield f"grep: {path}: Нет такого файла или директории"
+            return
+
+        if node.type != "dir":
+            # Файл читается построчно: содержимое целиком не декодируется
+            matches = filter(regex.search, iter_text_lines(node))
+            if count_only:
+                yield str(sum(1 for _ in matches))
+            else:
+                yield from matches
+            return
+
+        if not recursive:
+            yield f"grep: {path}: это директория"
+            return
+
+        workers = self.config.grep_workers or os.cpu_count() or 1
+        results = search_files(self.vfs, regex, self.vfs.iter_files(path), count_only, workers, cancel)
+        for file_path, found in results:
+            if count_only:
+                yield f"{file_path}:{found}"
+            else:
+                for line in found:
+                    yield f"{file_path}:{line}"
+
+    def cmd_wc(self, args):
+        """Команда wc - число строк, слов и байт"""
+
+        return '\n'.join(self.stream_wc(args))
+
+    def stream_wc(self, args, cancel=None, stdin=None):
+        """
+        Потоковый wc [путь ...]: строки, слова и байты каждого файла, для
+        нескольких файлов - итог. Без пути в конвейере считает строки предыдущей стадии
+        """
+
+        if not args:
+            if stdin is None:
+                yield "wc: отсутствуют аргументы. Использование: wc <файл> [<файл> ...]"
+                return
+            lines = words = size = 0
+            for line in stdin:
+                lines += 1
+                words += len(line.split())
+                size += len(line.encode('utf-8')) + 1
+            yield f"{lines} {words} {size}"
+            return
+
+        totals = [0, 0, 0]
+        for path in args:
+            if cancel is not None:
+                cancel.check()
+            node = self.vfs.get_node(path)
+            if node is None:
+                yield f"wc: {path}: Нет такого файла или директории"
+                continue
+            if node.type == "dir":
+                yield f"wc: {path}: это директория"
+                continue
+
+            # Файл читается построчно; слова не переходят через перевод строки,
+            # поэтому их можно считать по строкам
+            newlines = -1
+            words = size = 0
+            for line in iter_content_lines(node):
+                newlines += 1
+                words += len(line.split())
+                size += len(line.encode('utf-8'))
+            # Последняя строка без перевода строки тоже считается
+            counts = (newlines + (1 if line else 0), words, size + newlines)
+            totals = [total + count for total, count in zip(totals, counts)]
+            yield f"{counts[0]} {counts[1]} {counts[2]} {path}"
+
+        if len(args) > 1:
+            yield f"{totals[0]} {totals[1]} {totals[2]} итого"
+
+    def cmd_cat(self, args):
+        """Команда cat - вывод содержимого файлов"""
+
+        return '\n'.join(self.stream_cat(args))
+
+    def stream_cat(self, args, cancel=None, stdin=None):
+        """Потоковый cat [путь ...]: строки файлов по порядку; без пути в конвейере - строки предыдущей стадии"""
+
+        if not args:
+            if stdin is None:
+                yield "cat: отсутствуют аргументы. Использование: cat <файл> [<файл> ...]"
+                return
+            yield from stdin
+            return
+
+        for path in args:
+            if cancel is not None:
+                cancel.check()
+            node = self.vfs.get_node(path)
+            if node is None:
+                yield f"cat: {path}: Нет такого файла или директории"
+            elif node.type == "dir":
+                yield f"cat: {path}: это директория"
+            elif node._content:
+                # Завершающий перевод строки не дает лишней пустой строки: последняя
+                # пустая строка выдается, только если за ней есть другие
+                pending = None
+                for line in iter_content_lines(node):
+                    if pending is not None:
+                        yield pending
+                    pending = line
+                if pending:
+                    yield pending
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Пакетный прогон: вывод скриптов в пуле процессов совпадает с последовательным,
+в том числе для grep -r по поддереву, которое grep ищет собственным пулом
+"""
+
+import os
+import tempfile
+import unittest
+
+from batch_runner import run_batch, transcript_path
+from config import Config
+from content_search import PARALLEL_MIN_FILES
+from vfs import VFS
+
+FILES = PARALLEL_MIN_FILES + 100
+SCRIPTS = {
+    "a.vsh": "grep -r needle /data\n",
+    "b.vsh": "grep -r -c needle /data\nmkdir /data/new\n",
+    "c.vsh": "ls /data\ngrep -r missing /data\n",
+}
+
+
+def make_vfs():
+    vfs = VFS()
+    vfs.create_directory("/data")
+    data = vfs.get_node("/data")
+    for i in range(FILES):
+        content = f"line {i}\nneedle {i}\n" if i % 7 == 0 else f"line {i}\n"
+        vfs._add_child(data, f"f{i:05}.txt", "file", content)
+    return vfs
+
+
+class BatchTest(unittest.TestCase):
+
+    def run_scripts(self, vfs, config, workers):
+        with tempfile.TemporaryDirectory() as workdir:
+            script_dir = os.path.join(workdir, "scripts")
+            output_dir = os.path.join(workdir, "out")
+            os.makedirs(script_dir)
+            for name, text in SCRIPTS.items():
+                with open(os.path.join(script_dir, name), 'w', encoding='utf-8') as file:
+                    file.write(text)
+
+            with open(os.devnull, 'w') as report:
+                code = run_batch(vfs, config, script_dir, workers, output_dir, report)
+
+            transcripts = {}
+            for name in SCRIPTS:
+                script_path = os.path.join(script_dir, name)
+                with open(transcript_path(output_dir, script_path), encoding='utf-8', newline='') as file:
+                    transcripts[name] = file.read().replace(script_dir, "")
+            return code, transcripts
+
+    def test_parallel_grep_matches_sequential(self):
+        vfs = make_vfs()
+        config = Config()
+        config.grep_workers = 4
+
+        sequential = self.run_scripts(vfs, config, 1)
+        parallel = self.run_scripts(vfs, config, 2)
+
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(parallel[0], 0)
+        self.assertIn("/data/f00007.txt:needle 7", parallel[1]["a.vsh"])
+        self.assertNotIn("Ошибка", "".join(parallel[1].values()))
+        self.assertEqual(config.grep_workers, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
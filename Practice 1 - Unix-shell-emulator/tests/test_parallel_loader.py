@@ -0,0 +1,76 @@
+"""
+Параллельная загрузка CSV: то же дерево и те же ошибки, что у последовательной
+"""
+
+import os
+import tempfile
+import unittest
+
+from vfs import VFS
+
+FILLER = 60     # строк между конфликтующими, чтобы они попали в разные диапазоны
+
+
+def make_csv(workdir, name, head, tail):
+    rows = ["path,type,name,content,encoding"] + head
+    rows += [f"/fill{i % 7},file,f{i}.txt,content {i}," for i in range(FILLER)]
+    rows += tail
+    path = os.path.join(workdir, name)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write("\n".join(rows) + "\n")
+    return path
+
+
+def load(csv_path, workers):
+    vfs = VFS(default_structure=False)
+    try:
+        vfs.load_from_csv(csv_path, bulk=True, workers=workers)
+    except ValueError as e:
+        return None, str(e)
+    return vfs, None
+
+
+class ParallelLoadTest(unittest.TestCase):
+
+    def setUp(self):
+        self._workdir = tempfile.TemporaryDirectory()
+        self.workdir = self._workdir.name
+
+    def tearDown(self):
+        self._workdir.cleanup()
+
+    def assert_same_error(self, csv_path):
+        _, expected = load(csv_path, 1)
+        self.assertIsNotNone(expected)
+        for workers in (2, 4):
+            with self.subTest(workers=workers):
+                self.assertEqual(load(csv_path, workers)[1], expected)
+
+    def test_same_tree(self):
+        csv_path = make_csv(self.workdir, "ok.csv", ["/a/b,file,x,1,", "/a,dir,b,,"],
+                            ["/a/b,file,x,2,", "/a/b/c,dir,d,,", "/fill1,file,f1.txt,new,"])
+        sequential, _ = load(csv_path, 1)
+        for workers in (2, 4):
+            with self.subTest(workers=workers):
+                parallel, error = load(csv_path, workers)
+                self.assertIsNone(error)
+                self.assertEqual(sorted(path for path, _ in parallel._index.items()),
+                                 sorted(path for path, _ in sequential._index.items()))
+                self.assertEqual(parallel.get_node("/a/b/x").content, "2")
+                self.assertEqual(parallel.get_node("/fill1/f1.txt").content, "new")
+                for key in ('rows', 'dirs', 'files', 'updated'):
+                    self.assertEqual(parallel.load_stats[key], sequential.load_stats[key], key)
+
+    def test_type_conflict_across_ranges(self):
+        self.assert_same_error(make_csv(self.workdir, "types.csv", ["/,dir,c,,"], ["/,file,c,x,"]))
+
+    def test_file_in_path_across_ranges(self):
+        self.assert_same_error(make_csv(self.workdir, "path.csv", ["/,file,b,x,"], ["/b/d,file,e,y,"]))
+
+    def test_conflict_inside_later_range(self):
+        # Последовательно ошибка возникает на первой из двух строк, в процессе - на второй
+        self.assert_same_error(make_csv(self.workdir, "inner.csv", ["/,dir,c,,"], ["/,file,c,x,", "/c/a,file,z,y,"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Кэш результатов чистых команд и общий предел его памяти
+"""
+
+import unittest
+
+from config import Config
+from shell_core import ResultBudget, ShellCore
+from vfs import VFS
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.budget = ResultBudget(50000)
+        self.shells = []
+        for _ in range(3):
+            shell = ShellCore(VFS(), Config())
+            shell._budget = self.budget
+            for i in range(40):
+                shell.vfs.create_directory(f"/tmp/directory_{i}")
+            self.shells.append(shell)
+
+    def test_budget_is_shared_between_shells(self):
+        for _ in range(3):
+            for shell in self.shells:
+                for i in range(40):
+                    shell.execute("ls", [f"/tmp/directory_{i}/.."])
+
+        self.assertLessEqual(self.budget.used, self.budget.max_bytes)
+        cached = sum(len(shell._results) for shell in self.shells)
+        self.assertEqual(len(self.budget._entries), cached)
+        self.assertLess(cached, 3 * 40)
+
+    def test_cached_result_matches_fresh_one(self):
+        shell = self.shells[0]
+        first = shell.execute("ls", ["/tmp"])
+        self.assertEqual(shell.execute("ls", ["/tmp"]), first)
+        self.assertEqual(shell.cache_hits, 1)
+
+        shell.vfs.create_directory("/tmp/new")
+        self.assertIn("new", shell.execute("ls", ["/tmp"]).split("\n"))
+
+    def test_file_contents_are_not_cached(self):
+        shell = self.shells[0]
+        node = shell.vfs._add_child(shell.vfs.get_node("/tmp"), "notes.txt", "file", "первая\nвторая")
+        self.assertEqual(shell.execute("cat", ["/tmp/notes.txt"]), "первая\nвторая")
+        self.assertEqual(shell.execute("rev", ["/tmp/notes.txt"]), "яавреп\nяаротв")
+
+        # Содержимое меняется в обход счетчика изменений: кэш выдал бы прежний вывод
+        generation = shell.vfs.generation
+        node.content = "третья"
+        self.assertEqual(shell.vfs.generation, generation)
+        self.assertEqual(shell.execute("cat", ["/tmp/notes.txt"]), "третья")
+        self.assertEqual(shell.execute("rev", ["/tmp/notes.txt"]), "яьтерт")
+        self.assertEqual(len(shell._results), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
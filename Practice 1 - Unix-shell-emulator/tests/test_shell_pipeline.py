@@ -0,0 +1,40 @@
+"""
+Конвейеры команд: execute и execute_stream дают одинаковый результат
+"""
+
+import unittest
+
+from config import Config
+from shell_core import ShellCore
+from vfs import VFS
+
+COMMANDS = (
+    ("ls", ["/", "|", "rev"]),
+    ("ls", ["/", "|", "grep", "e"]),
+    ("ls", ["/", "|", "wc"]),
+    ("echo", ["abc", "|", "rev"]),
+    ("find", ["/", "-name", "u*", "|", "rev", "|", "rev"]),
+    ("ls", ["/", "|"]),
+    ("|", ["rev"]),
+)
+
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.shell = ShellCore(VFS(), Config())
+
+    def test_execute_matches_execute_stream(self):
+        for command, args in COMMANDS:
+            with self.subTest(command=" ".join([command] + args)):
+                streamed = "\n".join(self.shell.execute_stream(command, args))
+                self.assertEqual(self.shell.execute(command, args), streamed)
+
+    def test_execute_runs_pipeline(self):
+        self.assertEqual(self.shell.execute("ls", ["/", "|", "rev"]).split("\n"),
+                         [name[::-1] for name in self.shell.execute("ls", ["/"]).split("\n")])
+        self.assertEqual(self.shell.execute("echo", ["abc", "|", "rev"]), "cba")
+
+
+if __name__ == "__main__":
+    unittest.main()
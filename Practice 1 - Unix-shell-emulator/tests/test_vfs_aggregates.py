@@ -0,0 +1,132 @@
+"""
+Агрегаты директорий (stats) и отсортированные имена (names) при случайных изменениях
+
+После каждого шага поддерживаемые инкрементально значения сравниваются с полным
+пересчетом по дереву - в исходной VFS и во всех ее ветвях fork()
+"""
+
+import base64
+import os
+import random
+import tempfile
+import unittest
+
+from vfs import VFS
+from vfs_content import LazyContent
+
+STEPS = 1500
+SEEDS = (1, 2, 3)
+NAMES = ("a", "b", "c", "data", "log", "tmp", "x1", "x2", "Zeta", "ёж")
+
+
+def directories(vfs):
+    """Все директории дерева VFS"""
+
+    result = []
+    stack = [vfs.root]
+    while stack:
+        node = stack.pop()
+        result.append(node)
+        if node.children:
+            stack.extend(child for child in node.children.values() if child.type == "dir")
+    return result
+
+
+def recompute(directory):
+    """[файлов, директорий, байт] поддерева полным обходом"""
+
+    files = dirs = size = 0
+    stack = list(directory.children.values()) if directory.children else []
+    while stack:
+        node = stack.pop()
+        if node.type == "dir":
+            dirs += 1
+            if node.children:
+                stack.extend(node.children.values())
+        else:
+            files += 1
+            size += len(node.content.encode('utf-8'))
+    return [files, dirs, size]
+
+
+class AggregatesTest(unittest.TestCase):
+
+    def check(self, vfs):
+        for directory in directories(vfs):
+            if directory.stats is not None:
+                self.assertEqual(directory.stats, recompute(directory), directory.path)
+            if directory.names is not None:
+                self.assertEqual(directory.names, sorted(directory.children or ()), directory.path)
+            if directory.children:
+                for name, child in directory.children.items():
+                    self.assertEqual(child.path, "/" + name if directory.path == "/" else directory.path + "/" + name)
+
+    def random_steps(self, seed):
+        rng = random.Random(seed)
+        branches = [VFS()]
+
+        for step in range(STEPS):
+            vfs = rng.choice(branches)
+            target = rng.choice(directories(vfs))
+            action = rng.random()
+
+            if action < 0.35:
+                path = target.path.rstrip("/") + "/" + rng.choice(NAMES)
+                vfs.create_directory(path)
+            elif action < 0.6:
+                name = rng.choice(NAMES) + ".txt"
+                if not target.children or name not in target.children:
+                    content = rng.choice(("", "строка\n", "x" * rng.randint(1, 300)))
+                    vfs._add_child(target, name, "file", content)
+            elif action < 0.75:
+                vfs.subtree_stats(target.path)
+            elif action < 0.9:
+                vfs.directory_entries(target.path)
+            elif len(branches) < 12:
+                branches.append(vfs.fork())
+
+            if step % 25 == 0 or step == STEPS - 1:
+                for branch in branches:
+                    self.check(branch)
+
+        return branches
+
+    def test_random_mutations(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                self.random_steps(seed)
+
+    def test_public_queries_match_recompute(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                for vfs in self.random_steps(seed):
+                    for directory in directories(vfs):
+                        self.assertEqual(vfs.subtree_stats(directory.path),
+                                         (True, tuple(recompute(directory))))
+                        self.assertEqual(vfs.directory_entries(directory.path),
+                                         (True, sorted(directory.children or ())))
+
+    def test_lazy_sizes_keep_content_lazy(self):
+        contents = ["строка\\nё" * 40, "x" * 500, "\\t\\\\" * 30]
+        with tempfile.TemporaryDirectory() as workdir:
+            csv_path = os.path.join(workdir, "image.csv")
+            with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+                file.write("path,type,name,content,encoding\n/,dir,data,,\n")
+                for i, content in enumerate(contents):
+                    encoded = base64.b64encode(content.encode('utf-8')).decode('ascii')
+                    file.write(f"/data,file,f{i}.txt,{encoded},base64\n")
+
+            eager = VFS(default_structure=False)
+            eager.load_from_csv(csv_path, bulk=True)
+            lazy = VFS(default_structure=False)
+            lazy.load_from_csv(csv_path, bulk=True, lazy_content=True)
+
+            self.assertEqual(lazy.subtree_stats("/"), eager.subtree_stats("/"))
+            for i in range(len(contents)):
+                node = lazy.get_node(f"/data/f{i}.txt")
+                self.assertIs(node._content.__class__, LazyContent)
+                self.assertEqual(node.size, eager.get_node(f"/data/f{i}.txt").size)
+
+
+if __name__ == "__main__":
+    unittest.main()
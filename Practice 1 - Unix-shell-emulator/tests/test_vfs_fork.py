@@ -0,0 +1,59 @@
+"""
+Ветвление VFS: многократный fork одного образа и длинные цепочки ветвей
+"""
+
+import unittest
+
+from vfs import MAX_INDEX_DEPTH, VFS
+
+FORKS = 3000  # больше предела рекурсии интерпретатора
+
+
+class ForkTest(unittest.TestCase):
+
+    def test_many_forks_of_one_base(self):
+        base = VFS()
+        base.enable_name_index()
+        for i in range(FORKS):
+            branch = base.fork()
+            self.assertTrue(branch.create_directory(f"/tmp/b{i}")[0])
+            self.assertIsNotNone(branch._resolve_path(f"/tmp/b{i}"))
+
+        # Основа не меняется, поэтому ее индекс остается одним слоем
+        self.assertEqual(base._index.depth, 1)
+        self.assertIsNone(base._resolve_path("/tmp/b0"))
+        self.assertEqual(base.subtree_stats("/tmp"), (True, (0, 0, 0)))
+
+    def test_chain_of_changed_branches(self):
+        vfs = VFS()
+        vfs.enable_name_index()
+        branches = [vfs]
+        for i in range(FORKS):
+            vfs = vfs.fork()
+            self.assertTrue(vfs.create_directory(f"/tmp/c{i}")[0])
+            branches.append(vfs)
+
+        self.assertLessEqual(vfs._index.depth, MAX_INDEX_DEPTH + 1)
+        self.assertIsNotNone(vfs._resolve_path("/tmp/c0"))
+        self.assertIsNotNone(vfs._resolve_path(f"/tmp/c{FORKS - 1}"))
+        self.assertEqual(len(vfs._name_index.nodes("c0")), 1)
+        self.assertEqual(vfs.subtree_stats("/tmp"), (True, (0, FORKS, 0)))
+
+        # Каждая ветвь видит только свои директории и директории предков
+        middle = branches[FORKS // 2]
+        self.assertIsNotNone(middle._resolve_path(f"/tmp/c{FORKS // 2 - 1}"))
+        self.assertIsNone(middle._resolve_path(f"/tmp/c{FORKS // 2}"))
+
+    def test_unchanged_base_keeps_current_directory(self):
+        base = VFS()
+        base.current_node = base.root
+        first = base.fork()
+        second = base.fork()
+        self.assertTrue(second.create_directory("/opt")[0])
+        self.assertIs(second.current_node, second.root)
+        self.assertIsNone(first._resolve_path("/opt"))
+        self.assertIsNone(base._resolve_path("/opt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,28 +1,230 @@
-import socket
+import sys
+import gc
 import csv
 import os
-import base64
+import re
+import fnmatch
+import time
+from bisect import bisect_left, insort
+from name_index import NameIndex
+from vfs_content import LAZY_MIN_BYTES, ContentSource, ContentStore, LazyContent, count_quotes, decode_base64, encode_base64
+
+# parallel_loader (multiprocessing), vfs_journal (json) и vfs_snapshot импортируются
+# при первом использовании: обычный запуск эмулятора без них стартует быстрее
+
+# Содержимое файла в образе может занимать сотни мегабайт, а модуль csv
+# по умолчанию не принимает ячейки длиннее 128 КБ
+csv.field_size_limit(2 ** 31 - 1)
+
+MAX_INDEX_DEPTH = 32  # слоев индекса путей, после которых ветвление сливает цепочку
+
+_host_name = None
+
+
+def host_name():
+    """Имя хоста; запрашивается у ОС один раз на процесс"""
+
+    global _host_name
+    if _host_name is None:
+        if hasattr(os, 'uname'):
+            _host_name = os.uname().nodename
+        else:
+            import socket  # Windows: os.uname недоступен
+            _host_name = socket.gethostname()
+    return _host_name
 
 
 class VFSNode:
-    """Узел виртуальной файловой системы (файл или директория)"""
+    """
+    Узел виртуальной файловой системы (файл или директория)
+
+    VFSNode(name, "dir") создает DirNode, VFSNode(name, "file", content) - FileNode.
+    Узлы хранятся в __slots__, имена интернируются, поэтому одинаковые имена
+    (README, .bashrc, index.html) в большом образе занимают память один раз
+    """
+
+    # path - кэш абсолютного пути, заполняется при добавлении в VFS;
+    # seq - порядковый номер узла в индексе имен (None, если индекс не ведется)
+    __slots__ = ('name', 'parent', 'path', 'seq')
+
+    def __new__(cls, name, node_type="dir", content=""):
+        if cls is VFSNode:
+            if node_type == "dir":
+                cls = DirNode
+            elif node_type == "file":
+                cls = FileNode
+            else:
+                cls = SpecialNode
+        return object.__new__(cls)
+
+
+class DirNode(VFSNode):
+    """
+    Директория. Словарь дочерних узлов создается только при добавлении первого потомка
+
+    stats - [файлов, директорий, байт] во всем поддереве; заполняется при первом
+    запросе агрегатов (VFS._ensure_aggregates) и затем поддерживается при изменениях.
+    names - отсортированный список имен потомков; строится при первом упорядоченном
+    обходе (VFS._sorted_names), дальше новые имена вставляются в него bisect-ом
+    """
+
+    __slots__ = ('children', 'stats', 'names')
+
+    type = "dir"
+    content = ""
 
     def __init__(self, name, node_type="dir", content=""):
-        self.name = name
-        self.type = node_type                               # "dir" или "file"
-        self.content = content
-        self.children = {} if node_type == "dir" else None  # дочерние узлы могут быть только у директорий
+        self.name = sys.intern(name)
+        self.parent = None
+        self.path = None
+        self.seq = None
+        self.children = None
+        self.stats = None
+        self.names = None
+
+
+class FileNode(VFSNode):
+    """
+    Файл. Слота для дочерних узлов нет, children всегда None
+
+    Содержимое хранится строкой либо ссылкой LazyContent на ячейку отображенного
+    в память образа; такая ссылка декодируется при первом обращении к content
+    """
+
+    __slots__ = ('_content',)
+
+    type = "file"
+    children = None
+
+    def __init__(self, name, node_type="file", content=""):
+        self.name = sys.intern(name)
         self.parent = None
+        self.path = None
+        self.seq = None
+        self._content = content
+
+    @property
+    def content(self):
+        content = self._content
+        if content.__class__ is LazyContent:
+            source = content.source
+            content = source.load(content)
+            if not source.cache_size:
+                self._content = content  # без LRU декодированная строка остается в узле
+        return content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+
+    @property
+    def size(self):
+        """Размер содержимого в байтах UTF-8. Ленивое содержимое остается ссылкой"""
+
+        content = self._content
+        if content.__class__ is LazyContent:
+            return content.source.size(content)
+        return len(content.encode('utf-8'))
+
+
+class SpecialNode(FileNode):
+    """Узел с нестандартным типом из CSV. Ведет себя как файл, но сохраняет исходный тип"""
+
+    __slots__ = ('type',)
+
+    def __init__(self, name, node_type, content=""):
+        FileNode.__init__(self, name, node_type, content)
+        self.type = node_type
+
+
+class IndexOverlay:
+    """
+    Индекс путей ветви VFS после fork()
+
+    Пути, добавленные или скопированные ветвью, лежат в собственном словаре,
+    остальные берутся из общего индекса, который после ветвления не изменяется.
+    Поиск идет по цепочке слоев циклом; цепочка длиннее MAX_INDEX_DEPTH
+    при следующем ветвлении сливается в один слой
+    """
+
+    __slots__ = ('own', 'base', 'depth')
+
+    def __init__(self, base):
+        self.own = {}       # путь -> узел ветви
+        self.base = base    # общий индекс (dict или IndexOverlay)
+        self.depth = base.depth + 1 if base.__class__ is IndexOverlay else 1  # число слоев над словарем
+
+    def get(self, path, default=None):
+        layer = self
+        while layer.__class__ is IndexOverlay:
+            node = layer.own.get(path)
+            if node is not None:
+                return node
+            layer = layer.base
+        return layer.get(path, default)
+
+    def __getitem__(self, path):
+        node = self.get(path)
+        if node is None:
+            raise KeyError(path)
+        return node
+
+    def __setitem__(self, path, node):
+        self.own[path] = node
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def __len__(self):
+        return len(self.items())
+
+    def _layers(self):
+        """Слои цепочки сверху вниз и словарь в ее основании"""
+
+        layers = []
+        layer = self
+        while layer.__class__ is IndexOverlay:
+            layers.append(layer)
+            layer = layer.base
+        return layers, layer
+
+    def items(self):
+        layers, merged = self._layers()
+        merged = dict(merged)
+        for layer in reversed(layers):
+            merged.update(layer.own)
+        return merged.items()
+
+    def flattened(self):
+        """Тот же индекс одним слоем над общим словарем: O(записей во всех слоях)"""
+
+        layers, base = self._layers()
+        overlay = IndexOverlay(base)
+        for layer in reversed(layers):
+            overlay.own.update(layer.own)
+        return overlay
 
 
 class VFS:
     """Виртуальная файловая система (в разработке)"""
 
-    def __init__(self):
+    def __init__(self, default_structure=True):
         self.root = VFSNode("", "dir")
+        self.root.path = "/"
         self.current_node = self.root
-        self.name = f"Эмулятор - {socket.gethostname()}"
-        self._build_default_structure()  # структура vfs по умолчанию
+        self._index = {"/": self.root}  # абсолютный путь -> узел
+        self._name_index = None         # индекс имен для find, включается enable_name_index
+        self._owned = None              # директории, которые ветвь может изменять (None - VFS не ветвилась)
+        self._base_root = None          # корень неизменяемой основы ветви (после fork)
+        self._contents = ContentStore() # общее содержимое файлов с подсчетом ссылок
+        self._generation = [0]          # счетчик изменений дерева; список общий для всех session()
+        self.journal = None             # журнал изменений (vfs_journal.Journal), включается attach_journal
+        self.name = f"Эмулятор - {host_name()}"
+        self.load_stats = self._new_load_stats()  # статистика последней загрузки из CSV
+        self._diag = print          # канал диагностических сообщений загрузки
+        if default_structure:
+            # Если сразу загружается образ, дерево по умолчанию не строится
+            self._build_default_structure()  # структура vfs по умолчанию
 
     def _build_default_structure(self):
         """Создает минимальную структуру VFS по умолчанию"""
@@ -37,18 +239,219 @@ class VFS:
         # Устанавливаем текущую директорию в /home/user
         self.current_node = home_dir.children["user"]
 
+    def load_default(self):
+        """Заменяет дерево структурой по умолчанию"""
+
+        self._reset_tree()
+        self._build_default_structure()
+
     def _add_child(self, parent, name, node_type="dir", content=""):
         """Добавляет дочерний узел"""
 
         node = VFSNode(name, node_type, content)
-        node.parent = parent
-        if parent.children is not None:
-            parent.children[name] = node
+        if parent.type == "dir":
+            self._link(parent, node)
+        else:
+            node.parent = parent
         return node
 
+    def _new_node(self, name, node_type, content):
+        """Создает узел нужного класса без диспетчеризации через VFSNode"""
+
+        if node_type == "dir":
+            return DirNode(name)
+        elif node_type == "file":
+            return FileNode(name, node_type, content)
+        else:
+            return SpecialNode(name, node_type, content)
+
+    def _link(self, parent, node):
+        """Подключает узел к директории и регистрирует его путь в индексе"""
+
+        if self._owned is not None:
+            # После fork() общую директорию сначала копируем
+            parent = self._writable(parent)
+            self._owned.add(node)
+
+        node.parent = parent
+        if self.root.stats is not None:
+            # Агрегаты уже посчитаны - поддерживаем их на пути до корня
+            if node.type == "dir":
+                node.stats = [0, 0, 0]
+                self._adjust_aggregates(parent, 0, 1, 0)
+            else:
+                self._adjust_aggregates(parent, 1, 0, node.size)
+        parent_path = parent.path
+        node.path = "/" + node.name if parent_path == "/" else parent_path + "/" + node.name
+        if parent.children is None:
+            parent.children = {}
+        if parent.names is not None and node.name not in parent.children:
+            insort(parent.names, node.name)
+        parent.children[node.name] = node
+        self._index[node.path] = node
+        if self._name_index is not None:
+            self._name_index.add(node)
+
+    def enable_name_index(self):
+        """
+        Включает индекс имен для find
+
+        Индекс строится по текущему дереву, затем пополняется при каждом добавлении
+        узла и перестраивается при загрузке из CSV
+        """
+
+        self._name_index = NameIndex()
+        self._name_index.add_tree(self.root)
+
+    def fork(self):
+        """
+        Ветвь VFS с копированием при записи
+
+        Исходная VFS и ветвь продолжают работать поверх общего состояния на момент
+        ветвления: все узлы, индекс путей и индекс имен остаются общими, а при
+        изменении директории ветвь копирует ее и путь до корня (O(глубина)).
+        Ветвление стоит O(1) плюс копия словаря потомков корня. VFS, не менявшаяся
+        с прошлого ветвления, отдает новой ветви ту же неизменяемую основу, поэтому
+        многократное ветвление одного образа не удлиняет цепочку индексов
+        """
+
+        branch = object.__new__(type(self))
+        branch.__dict__.update(self.__dict__)
+        branch.journal = None  # изменения ветви в журнал исходной VFS не попадают
+        branch._generation = [self.generation]  # изменения ветви считаются отдельно
+
+        if self._owned is not None and len(self._owned) == 1:
+            # С прошлого ветвления скопирован только корень: основа та же
+            index = self._index.base
+            branch.root = self._base_root
+            if branch.current_node is self.root:
+                branch.current_node = self._base_root
+        else:
+            index = self._index
+            if index.__class__ is IndexOverlay and index.depth >= MAX_INDEX_DEPTH:
+                index = index.flattened()
+            self._branch(index)
+        branch._branch(index)
+        return branch
+
+    def _branch(self, index):
+        """Делает index общей неизменяемой основой и заводит свой слой изменений"""
+
+        self._index = IndexOverlay(index)
+        if self._name_index is not None:
+            self._name_index = self._name_index.fork()
+
+        # Корень копируется сразу, поэтому основа ветви после ветвления не меняется
+        self._base_root = self.root
+        self._owned = set()
+        self._writable(self.root)
+
+    def _writable(self, node):
+        """
+        Директория, которую ветвь может изменять
+
+        Общая с другими ветвями директория копируется вместе с путем до корня:
+        копия получает тот же путь и seq, а словарь потомков копируется
+        """
+
+        owned = self._owned
+        if owned is None or node in owned:
+            return node
+
+        copy = DirNode(node.name)
+        copy.path = node.path
+        copy.seq = node.seq
+        if node.children:
+            copy.children = dict(node.children)
+        if node.stats is not None:
+            copy.stats = list(node.stats)
+        if node.names is not None:
+            copy.names = list(node.names)
+
+        if node.path == "/":
+            self.root = copy
+        else:
+            parent = self._writable(self._index[node.path.rpartition("/")[0] or "/"])
+            copy.parent = parent
+            parent.children[copy.name] = copy
+
+        self._index[copy.path] = copy
+        owned.add(copy)
+        if self.current_node is node:
+            self.current_node = copy
+        return copy
+
+    def _parent_of(self, node):
+        """
+        Родительская директория узла
+
+        У общих узлов ветви ссылка parent может указывать на директорию до
+        копирования, поэтому после fork() родитель ищется по пути
+        """
+
+        if self._owned is None or node.path is None:
+            return node.parent
+        return self._index.get(node.path.rpartition("/")[0] or "/", node.parent)
+
+    def session(self):
+        """
+        Представление VFS для отдельного сеанса
+
+        Дерево, индексы, источник содержимого и счетчик изменений общие с исходной
+        VFS, собственная только текущая директория, поэтому представление создается
+        за O(1). Изменения дерева (mkdir) видны всем сеансам. Представления создаются
+        после fork(), а не до него: ветвление заменяет индексы самой VFS
+        """
+
+        view = object.__new__(type(self))
+        view.__dict__.update(self.__dict__)
+        return view
+
+    @property
+    def generation(self):
+        """
+        Номер версии дерева: растет при каждом изменении и не меняется при переходах cd
+
+        Изменения увеличивают его сами: create_directory - после добавления узла,
+        загрузка образа - при сбросе дерева и по завершении (узлы во время
+        загрузки счетчик не трогают, чтобы не замедлять ее). Новые операции
+        записи тоже должны увеличивать self._generation[0]
+        """
+
+        return self._generation[0]
+
     def _resolve_path(self, path):
         """Разрешает путь к узлу VFS"""
 
+        # Нормализованные пути (без . и ..) находятся по индексу за O(1)
+        node = self._lookup_index(path)
+        if node is not None:
+            return node
+
+        return self._walk_path(path)
+
+    def _lookup_index(self, path):
+        """Поиск узла по индексу путей. None - путь нужно разбирать по компонентам"""
+
+        if path.startswith("/"):
+            key = path
+        else:
+            base = self.current_node.path
+            key = base + path if base == "/" else base + "/" + path
+
+        if len(key) > 1 and key.endswith("/"):
+            key = key.rstrip("/") or "/"
+
+        # Компоненты ".", ".." и пустые обрабатывает только пошаговый разбор
+        probe = key + "/"
+        if "//" in probe or "/./" in probe or "/../" in probe:
+            return None
+
+        return self._index.get(key)
+
+    def _walk_path(self, path):
+        """Пошаговый разбор пути от корня или текущей директории"""
+
         if path.startswith("/"):
             # Абсолютный путь
             current = self.root
@@ -63,7 +466,7 @@ class VFS:
                 continue
             elif part == "..":
                 if current.parent:
-                    current = current.parent
+                    current = self._parent_of(current)
             else:
                 if (current.children and
                         part in current.children and
@@ -77,130 +480,796 @@ class VFS:
 
         return current
 
-    def load_from_csv(self, csv_path):
-        """Загружает VFS из CSV файла"""
+    def load_from_csv(self, csv_path, bulk=False, logger=None, lazy_content=False, content_cache_size=0,
+                      workers=1):
+        """
+        Загружает VFS из CSV файла
+
+        В режиме bulk строки читаются потоково через csv.reader без построчной печати:
+        диагностика уходит в logger (если передан) и в счетчики load_stats.
+        При lazy_content файл отображается в память, а у файлов запоминаются только
+        смещение и длина ячейки content; декодирование откладывается до первого чтения,
+        content_cache_size задает размер LRU декодированного содержимого.
+        При workers > 1 строки разбираются, декодируются и собираются в таблицы
+        узлов в пуле процессов (parallel_loader), ленивое содержимое при этом
+        не используется
+        """
 
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"CSV файл не найден: {csv_path}")
 
         try:
             # Очищаем текущую структуру
-            self.root = VFSNode("", "dir")
-            self.current_node = self.root
+            self._reset_tree()
+            self._begin_load(bulk or lazy_content or workers > 1, logger)
+
+            if lazy_content:
+                self._content_source = ContentSource(csv_path, content_cache_size)
+                self._load_rows_lazy(self._content_source)
+            elif workers > 1:
+                import parallel_loader
+                self._content_source = None
+                parallel_loader.load_rows_parallel(self, csv_path, workers)
+            else:
+                self._content_source = None
+                with open(csv_path, 'r', encoding='utf-8') as file:
+                    if bulk:
+                        self._load_rows_bulk(file)
+                    else:
+                        reader = csv.DictReader(file)
 
-            with open(csv_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                
-                for row in reader:
-                    self._process_csv_row(row)
+                        for row in reader:
+                            self._process_csv_row(row)
 
             # Возвращаемся в корневую директорию
             self.current_node = self.root
 
         except Exception as e:
             raise ValueError(f"Ошибка загрузки CSV: {str(e)}")
+        finally:
+            self._finish_load()
+
+    def _reset_tree(self):
+        """Заменяет дерево пустым корнем и сбрасывает индексы"""
+
+        self.root = VFSNode("", "dir")
+        self.root.path = "/"
+        self.current_node = self.root
+        self._index = {"/": self.root}
+        self._owned = None
+        self._base_root = None
+        self._contents = ContentStore()
+        self._generation[0] += 1
+        if self._name_index is not None:
+            self._name_index = NameIndex()
+
+    def save_snapshot(self, snapshot_path, source_stamp=(0, 0)):
+        """Сохраняет дерево в двоичный снимок (см. vfs_snapshot)"""
+
+        import vfs_snapshot
+        vfs_snapshot.save_snapshot(self, snapshot_path, source_stamp)
+
+    def save_csv(self, csv_path):
+        """
+        Сохраняет дерево в CSV формата load_from_csv
+
+        Содержимое пишется как есть (модуль csv экранирует запятые, кавычки и переводы
+        строк), в base64 - только если по краям есть пробельные символы, которые
+        загрузчик обрезал бы. Файл заменяется атомарно
+        """
+
+        tmp_path = csv_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file, lineterminator="\n")
+            writer.writerow(['path', 'type', 'name', 'content', 'encoding'])
+
+            # Строки директории пишутся раньше строк ее потомков, порядок потомков сохраняется
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                if not node.children:
+                    continue
+
+                subdirs = []
+                for name, child in node.children.items():
+                    if child.type == "dir":
+                        writer.writerow([node.path, "dir", name, "", ""])
+                        subdirs.append(child)
+                    else:
+                        content = child.content or ""
+                        if content != content.strip():
+                            writer.writerow([node.path, child.type, name, encode_base64(content), "base64"])
+                        else:
+                            writer.writerow([node.path, child.type, name, content, ""])
+                stack.extend(reversed(subdirs))
+
+        os.replace(tmp_path, csv_path)
+
+    def attach_journal(self, journal_path, base_stamp=(0, 0), **options):
+        """
+        Применяет журнал изменений поверх загруженного образа и начинает дописывать в него
+
+        base_stamp - (mtime_ns, size) базового образа; журнал, начатый для другой
+        версии образа, не применяется. Возвращает число примененных изменений
+        """
+
+        import vfs_journal
+
+        applied = 0
+        valid_length = None
+        if os.path.exists(journal_path):
+            journal_stamp, records, valid_length = vfs_journal.read_journal(journal_path)
+            if journal_stamp is not None and journal_stamp != tuple(base_stamp):
+                raise ValueError(f"Журнал {journal_path} создан для другой версии образа")
+            for record in records:
+                if vfs_journal.apply_record(self, record):
+                    applied += 1
+
+        self.journal = vfs_journal.Journal(journal_path, base_stamp, valid_length, **options)
+        return applied
+
+    def compact_journal(self, csv_path):
+        """
+        Сохраняет дерево как новый базовый CSV и начинает журнал заново
+
+        Журнал должен быть начат для текущей версии csv_path: иначе дерево в памяти
+        не является этим образом с изменениями, и перезапись CSV потеряла бы данные
+        """
+
+        if self.journal is not None and os.path.exists(csv_path):
+            info = os.stat(csv_path)
+            if self.journal.base_stamp != (info.st_mtime_ns, info.st_size):
+                raise ValueError(f"Журнал {self.journal.path} создан для другой версии образа {csv_path}")
+
+        self.save_csv(csv_path)
+        if self.journal is not None:
+            info = os.stat(csv_path)
+            self.journal.reset((info.st_mtime_ns, info.st_size))
+
+    def load_snapshot(self, snapshot_path, lazy_content=True, content_cache_size=0):
+        """Загружает дерево из двоичного снимка вместо разбора CSV"""
+
+        if not os.path.exists(snapshot_path):
+            raise FileNotFoundError(f"Снимок VFS не найден: {snapshot_path}")
+
+        try:
+            self._begin_load(True, None)
+            import vfs_snapshot
+            count = vfs_snapshot.load_snapshot(self, snapshot_path, lazy_content, content_cache_size)
+            self.load_stats['rows'] = count - 1  # все узлы, кроме корня
+            self.current_node = self.root
+        except Exception as e:
+            raise ValueError(f"Ошибка загрузки снимка: {str(e)}")
+        finally:
+            self._finish_load()
+
+    def load_with_snapshot(self, csv_path, snapshot_path=None, **load_options):
+        """
+        Загружает образ через снимок рядом с CSV
+
+        Если снимок (по умолчанию <csv>.snapshot) построен по текущей версии CSV
+        (совпадают mtime и размер), загружается он. Иначе разбирается CSV
+        и снимок пересобирается. Возвращает (использован ли снимок, сообщение
+        об ошибке сохранения нового снимка или None)
+        """
+
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"CSV файл не найден: {csv_path}")
+
+        snapshot_path = snapshot_path or csv_path + ".snapshot"
+        info = os.stat(csv_path)
+        stamp = (info.st_mtime_ns, info.st_size)
+
+        import vfs_snapshot
+        header = vfs_snapshot.read_header(snapshot_path)
+        if header is not None and header['source_stamp'] == stamp:
+            self.load_snapshot(snapshot_path, content_cache_size=load_options.get('content_cache_size', 0))
+            return True, None
+
+        self.load_from_csv(csv_path, **load_options)
+        try:
+            self.save_snapshot(snapshot_path, stamp)
+        except OSError as e:
+            return False, f"Не удалось сохранить снимок VFS: {e}"
+        return False, None
+
+    def _begin_load(self, bulk, logger):
+        """Подготавливает кэш директорий, канал диагностики и счетчики загрузки"""
+
+        if not bulk:
+            self._diag = print
+        elif logger is not None:
+            self._diag = logger.debug
+        else:
+            self._diag = None
+
+        self.load_stats = self._new_load_stats()
+        self._load_started = time.perf_counter()
+
+        # Сборщик циклического мусора на время загрузки отключаем: миллионы новых
+        # узлов иначе вызывают многократные полные проходы по всем объектам
+        self._gc_was_enabled = gc.isenabled()
+        gc.disable()
+
+    def _new_load_stats(self):
+        """Пустые счетчики загрузки"""
+
+        return {
+            'rows': 0,          # обработано строк
+            'dirs': 0,          # создано директорий (включая промежуточные)
+            'files': 0,         # создано файлов
+            'updated': 0,       # обновлено существующих узлов
+            'skipped': 0,       # пропущено некорректных строк
+            'unique_contents': 0,   # различных тел файлов в хранилище содержимого
+            'dedup_ratio': 1.0,     # во сколько раз содержимое файлов больше хранимого
+            'seconds': 0.0,
+            'rows_per_sec': 0.0
+        }
+
+    def _finish_load(self):
+        """Сбрасывает временные структуры загрузки и считает скорость"""
+
+        elapsed = time.perf_counter() - self._load_started
+        stats = self.load_stats
+        stats['seconds'] = elapsed
+        stats['rows_per_sec'] = stats['rows'] / elapsed if elapsed > 0 else 0.0
+        stats['unique_contents'] = len(self._contents)
+        stats['dedup_ratio'] = self._contents.ratio
+        self._generation[0] += 1
+
+        self._diag = print
+        if self._gc_was_enabled:
+            gc.enable()
+
+    def _load_rows_bulk(self, file):
+        """Потоковая обработка CSV без создания словаря на каждую строку"""
+
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        columns = {name: index for index, name in enumerate(header)}
+        if 'path' not in columns or 'type' not in columns or 'name' not in columns:
+            # Как и в обычном режиме, все строки без обязательных полей пропускаются
+            for row in reader:
+                if row:
+                    self.load_stats['rows'] += 1
+                    self.load_stats['skipped'] += 1
+            return
+
+        path_i = columns['path']
+        type_i = columns['type']
+        name_i = columns['name']
+        content_i = columns.get('content')
+        encoding_i = columns.get('encoding')
+        width = len(header)
+        stats = self.load_stats
+
+        for row in reader:
+            if not row:
+                continue  # пустые строки пропускает и csv.DictReader
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+
+            stats['rows'] += 1
+            content = row[content_i].strip() if content_i is not None else ''
+            encoding = row[encoding_i].strip() if encoding_i is not None else ''
+
+            if encoding == 'base64':
+                content = self._decode_base64(content)
+
+            self._insert_node(row[path_i].strip(), row[type_i].strip(), row[name_i].strip(), content)
+
+    def _load_rows_lazy(self, source):
+        """
+        Разбор отображенного в память CSV с запоминанием позиций ячеек content
+
+        Строки без кавычек разбираются прямо по байтам. Строки с кавычками
+        (запятые или переводы строк внутри ячейки) редки, их разбирает модуль csv,
+        а содержимое таких строк декодируется сразу
+        """
+
+        buffer = source.buffer
+        size = len(buffer)
+        stats = self.load_stats
+
+        header_end = buffer.find(b'\n')
+        if header_end == -1:
+            header_end = size
+        header = next(csv.reader([buffer[:header_end].decode('utf-8')]), None)
+        if not header:
+            return
+
+        columns = {name: index for index, name in enumerate(header)}
+        required = ('path' in columns and 'type' in columns and 'name' in columns)
+        path_i = columns.get('path')
+        type_i = columns.get('type')
+        name_i = columns.get('name')
+        content_i = columns.get('content')
+        encoding_i = columns.get('encoding')
+        width = len(header)
+
+        pos = header_end + 1
+        while pos < size:
+            end = buffer.find(b'\n', pos)
+            if end == -1:
+                end = size
+
+            if buffer.find(b'"', pos, end) != -1:
+                # Ячейка в кавычках может продолжаться на следующих строках
+                quotes = count_quotes(buffer, pos, end)
+                while quotes % 2 and end < size:
+                    next_end = buffer.find(b'\n', end + 1)
+                    if next_end == -1:
+                        next_end = size
+                    quotes += count_quotes(buffer, end, next_end)
+                    end = next_end
+                record = buffer[pos:end].decode('utf-8')
+                next_pos = end + 1
+                row = next(csv.reader([record]), [])
+                if row:
+                    stats['rows'] += 1
+                    if not required:
+                        stats['skipped'] += 1
+                    else:
+                        row = row + [''] * (width - len(row))
+                        content = row[content_i].strip() if content_i is not None else ''
+                        if encoding_i is not None and row[encoding_i].strip() == 'base64':
+                            content = self._decode_base64(content)
+                        self._insert_node(row[path_i].strip(), row[type_i].strip(),
+                                          row[name_i].strip(), content)
+                pos = next_pos
+                continue
+
+            line_end = end
+            if line_end > pos and buffer[line_end - 1] == 13:  # \r перед \n
+                line_end -= 1
+            line = buffer[pos:line_end]
+            line_start = pos
+            pos = end + 1
+
+            if not line:
+                continue  # пустые строки пропускает и csv.DictReader
+
+            stats['rows'] += 1
+            if not required:
+                stats['skipped'] += 1
+                continue
+
+            fields = line.split(b',')
+            if len(fields) < width:
+                fields += [b''] * (width - len(fields))
+
+            content = ''
+            if content_i is not None:
+                cell = fields[content_i]
+                stripped = cell.strip()
+                is_base64 = encoding_i is not None and fields[encoding_i].strip() == b'base64'
+                if len(stripped) < LAZY_MIN_BYTES:
+                    # Короткое содержимое дешевле сразу хранить строкой
+                    content = stripped.decode('utf-8')
+                    if is_base64:
+                        content = self._decode_base64(content)
+                else:
+                    offset = line_start + content_i + sum(map(len, fields[:content_i]))
+                    offset += len(cell) - len(cell.lstrip())
+                    content = LazyContent(source, offset, len(stripped), is_base64)
+
+            self._insert_node(fields[path_i].decode('utf-8').strip(),
+                              fields[type_i].decode('utf-8').strip(),
+                              fields[name_i].decode('utf-8').strip(),
+                              content)
+
+    def _decode_base64(self, content):
+        """Декодирует base64-содержимое и обрабатывает экранированные символы"""
+
+        diag = self._diag
+        try:
+            content = decode_base64(content)
+            if diag:
+                diag(f"Декодировано base64 содержимое: {content}")
+        except Exception as e:
+            content = f"Ошибка декодирования base64: {str(e)}"
+            if diag:
+                diag(f"Ошибка декодирования base64: {e}")
+        return content
 
     def _process_csv_row(self, row):
         """Обрабатывает строку CSV и создает соответствующий узел в VFS"""
-        
+
+        diag = self._diag
         try:
+            self.load_stats['rows'] += 1
+
             # Проверяем обязательные поля и обрабатываем None значения
             if 'path' not in row or 'type' not in row or 'name' not in row:
-                print(f"Пропуск строки с отсутствующими обязательными полями: {row}")
+                self.load_stats['skipped'] += 1
+                if diag:
+                    diag(f"Пропуск строки с отсутствующими обязательными полями: {row}")
                 return
-            
+
             # Безопасно обрабатываем значения, которые могут быть None
             path = row['path'] or ''
             node_type = row['type'] or ''
             name = row['name'] or ''
             content = row.get('content', '') or ''
             encoding = row.get('encoding', '') or ''
-    
+
             path = path.strip()
             node_type = node_type.strip()
             name = name.strip()
             content = content.strip()
             encoding = encoding.strip()
 
-            print(f"Обработка: path='{path}', type='{node_type}', name='{name}', encoding='{encoding}'")
+            if diag:
+                diag(f"Обработка: path='{path}', type='{node_type}', name='{name}', encoding='{encoding}'")
 
             # Обрабатываем кодировку base64
             if encoding == 'base64':
-                try:
-                    content = base64.b64decode(content).decode('utf-8')
-                    print(f"Декодировано base64 содержимое: {content}")
-                except Exception as e:
-                    content = f"Ошибка декодирования base64: {str(e)}"
-                    print(f"Ошибка декодирования base64: {e}")
-                else:
-                    # Обрабатываем экранированные символы в обычном содержимом
-                    if content:
-                        content = content.replace('\\n', '\n').replace('\\t', '\t')
-
-            # Разбираем путь
-            path_parts = [p for p in path.split('/') if p]  # Убираем пустые части
-            
-            print(f"Разобранный путь: {path_parts}")
-            
-            # Начинаем с корневой директории
-            current_node = self.root
-            
-            # Создаем все промежуточные директории
-            for part in path_parts:
-                if current_node.children is None:
-                    current_node.children = {}
-                    
-                if part not in current_node.children:
-                    # Создаем промежуточную директорию
-                    print(f"Создание директории: {part}")
-                    new_dir = VFSNode(part, "dir")
-                    new_dir.parent = current_node
-                    current_node.children[part] = new_dir
-                    current_node = new_dir
-                else:
-                    current_node = current_node.children[part]
-                    if current_node.type != "dir":
-                        # Если нашли файл вместо директории, это ошибка в структуре
-                        error_msg = f"Невозможно создать путь {path}: {part} является файлом"
-                        print(f"Ошибка: {error_msg}")
-                        raise ValueError(error_msg)
-
-            # Создаем конечный узел
+                content = self._decode_base64(content)
+
+            self._insert_node(path, node_type, name, content)
+
+        except Exception as e:
+            if diag:
+                diag(f"Ошибка обработки строки CSV {row}: {e}")
+            raise
+
+    def _materialize_path(self, path):
+        """
+        Возвращает директорию по пути из CSV, создавая недостающие промежуточные директории
+
+        Уже созданные директории находятся по индексу путей, поэтому строки
+        с одинаковым path не проходят дерево заново
+        """
+
+        diag = self._diag
+        current_node = self._index.get(path)
+        if current_node is not None and current_node.type == "dir":
+            if diag:
+                diag(f"Разобранный путь: {[p for p in path.split('/') if p]}")
+            return current_node
+
+        # Разбираем путь
+        path_parts = [p for p in path.split('/') if p]  # Убираем пустые части
+
+        if diag:
+            diag(f"Разобранный путь: {path_parts}")
+
+        # Начинаем с корневой директории
+        current_node = self.root
+
+        # Создаем все промежуточные директории
+        for part in path_parts:
             if current_node.children is None:
                 current_node.children = {}
-                
-            if name in current_node.children:
-                # Обновляем существующий узел
-                existing_node = current_node.children[name]
-                if existing_node.type != node_type:
-                    error_msg = f"Конфликт типов для {path}/{name}"
-                    print(f"Ошибка: {error_msg}")
-                    raise ValueError(error_msg)
-                existing_node.content = content
-                print(f"Обновлен существующий узел: {name}")
+
+            if part not in current_node.children:
+                # Создаем промежуточную директорию
+                if diag:
+                    diag(f"Создание директории: {part}")
+                new_dir = DirNode(part)
+                self._link(current_node, new_dir)
+                current_node = new_dir
+                self.load_stats['dirs'] += 1
             else:
-                # Создаем новый узел
-                print(f"Создание нового узла: {name} типа {node_type}")
-                new_node = VFSNode(name, node_type, content)
-                new_node.parent = current_node
-                current_node.children[name] = new_node
-                
-        except Exception as e:
-            print(f"Ошибка обработки строки CSV {row}: {e}")
-            raise
+                current_node = current_node.children[part]
+                if current_node.type != "dir":
+                    # Если нашли файл вместо директории, это ошибка в структуре
+                    error_msg = f"Невозможно создать путь {path}: {part} является файлом"
+                    if diag:
+                        diag(f"Ошибка: {error_msg}")
+                    raise ValueError(error_msg)
 
-    def get_current_path(self):
-        """Возвращает текущий путь в VFS"""
+        return current_node
 
-        path_parts = []
-        node = self.current_node
+    def _insert_node(self, path, node_type, name, content):
+        """Создает или обновляет узел name в директории path"""
 
-        # Поднимаемся вверх по иерархии до корня
-        while node and node.parent:
-            path_parts.insert(0, node.name)
+        diag = self._diag
+        current_node = self._materialize_path(path)
+
+        # Создаем конечный узел
+        if current_node.children is None:
+            current_node.children = {}
+
+        if name in current_node.children:
+            # Обновляем существующий узел
+            existing_node = current_node.children[name]
+            if existing_node.type != node_type:
+                error_msg = f"Конфликт типов для {path}/{name}"
+                if diag:
+                    diag(f"Ошибка: {error_msg}")
+                raise ValueError(error_msg)
+            if node_type != "dir":
+                if self.root.stats is not None:
+                    self._adjust_aggregates(current_node, 0, 0, len(content.encode('utf-8')) - existing_node.size)
+                # Новое содержимое получает свою ссылку, общая строка других узлов не меняется
+                self._contents.release(existing_node._content)
+                if content.__class__ is str:
+                    content = self._contents.acquire(content)
+                existing_node.content = content  # у директорий нет содержимого
+            self.load_stats['updated'] += 1
+            if diag:
+                diag(f"Обновлен существующий узел: {name}")
+        else:
+            # Создаем новый узел
+            if diag:
+                diag(f"Создание нового узла: {name} типа {node_type}")
+            if node_type != "dir" and content.__class__ is str:
+                content = self._contents.acquire(content)
+            new_node = self._new_node(name, node_type, content)
+            self._link(current_node, new_node)
+            self.load_stats['dirs' if node_type == "dir" else 'files'] += 1
+
+    def _ensure_aggregates(self):
+        """
+        Считает агрегаты всех директорий одним обходом в обратном порядке
+
+        Признак готовности - stats у корня: корень общий для всех представлений
+        session(), поэтому агрегаты поддерживаются при изменениях из любого сеанса
+        """
+
+        if self.root.stats is not None:
+            return
+
+        # Сначала потомки, затем директория
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if node.children:
+                stack.extend(child for child in node.children.values() if child.type == "dir")
+
+        for node in reversed(order):
+            files = dirs = size = 0
+            if node.children:
+                for child in node.children.values():
+                    if child.type == "dir":
+                        child_files, child_dirs, child_size = child.stats
+                        files += child_files
+                        dirs += child_dirs + 1
+                        size += child_size
+                    else:
+                        files += 1
+                        size += child.size
+            node.stats = [files, dirs, size]
+
+    def _adjust_aggregates(self, directory, files, dirs, size):
+        """Добавляет разницу к агрегатам директории и всех ее предков"""
+
+        node = directory
+        while node is not None:
+            stats = node.stats
+            stats[0] += files
+            stats[1] += dirs
+            stats[2] += size
             node = node.parent
 
-        return "/" + "/".join(path_parts) if path_parts else "/"
+    def subtree_stats(self, path=None):
+        """
+        (файлов, директорий, байт) в поддереве за O(1) после первого запроса
+
+        Для файла - (1, 0, размер). Возвращает (True, кортеж) или (False, сообщение)
+        """
+
+        node = self._resolve_path(path) if path else self.current_node
+        if not node:
+            return False, f"Путь не найден: {path}"
+        if node.type != "dir":
+            return True, (1, 0, node.size)
+
+        self._ensure_aggregates()
+        return True, tuple(node.stats)
+
+    def iter_du(self, path=None, cancel=None):
+        """
+        Размеры директорий поддерева (байт, путь) в обратном порядке обхода, как du
+
+        Возвращает генератор либо None, если путь не найден
+        """
+
+        node = self._resolve_path(path) if path else self.current_node
+        if not node:
+            return None
+        start_path = path or "."
+        if node.type != "dir":
+            return iter([(node.size, start_path)])
+
+        self._ensure_aggregates()
+        return self._iter_du(node, start_path, cancel)
+
+    def _iter_du(self, start_node, start_path, cancel):
+        # Директория выдается после всех своих поддиректорий
+        stack = [(start_node, start_path, False)]
+        while stack:
+            if cancel is not None:
+                cancel.check()
+            node, node_path, expanded = stack.pop()
+            if expanded:
+                yield node.stats[2], node_path
+                continue
+
+            stack.append((node, node_path, True))
+            if node.children:
+                for name in reversed(self._sorted_names(node)):
+                    child = node.children[name]
+                    if child.type == "dir":
+                        child_path = f"{node_path}/{name}" if node_path != "/" else f"/{name}"
+                        stack.append((child, child_path, False))
+
+    def iter_tree(self, path=None, cancel=None):
+        """
+        Строки вывода tree: путь и поддерево с псевдографикой, имена по алфавиту
+
+        Возвращает генератор либо None, если директория не найдена
+        """
+
+        node = self._resolve_path(path) if path else self.current_node
+        if not node or node.type != "dir":
+            return None
+        return self._iter_tree(node, path or ".", cancel)
+
+    def _iter_tree(self, start_node, start_path, cancel):
+        yield start_path
+
+        # В стеке итераторы по отсортированным потомкам и отступ их уровня
+        stack = [(iter(self._sorted_children(start_node)), "")]
+        while stack:
+            if cancel is not None:
+                cancel.check()
+            children, indent = stack[-1]
+
+            for name, child, last in children:
+                yield f"{indent}{'└── ' if last else '├── '}{name}"
+                if child.type == "dir" and child.children:
+                    stack.append((iter(self._sorted_children(child)), indent + ("    " if last else "│   ")))
+                    break
+            else:
+                stack.pop()
+
+    def iter_files(self, path=None, cancel=None):
+        """
+        Файлы поддерева в порядке путей: потомки каждой директории по алфавиту,
+        файлы поддиректории идут сразу за ней, как в tree
+
+        Для пути к файлу выдается сам файл. Возвращает генератор либо None,
+        если путь не найден
+        """
+
+        node = self._resolve_path(path) if path else self.current_node
+        if not node:
+            return None
+        if node.type != "dir":
+            return iter((node,))
+        return self._iter_files(node, cancel)
+
+    def _iter_files(self, start_node, cancel):
+        stack = [iter(self._sorted_names(start_node)[:])] if start_node.children else []
+        parents = [start_node]
+        while stack:
+            if cancel is not None:
+                cancel.check()
+            children = parents[-1].children
+
+            for name in stack[-1]:
+                child = children[name]
+                if child.type != "dir":
+                    yield child
+                elif child.children:
+                    # Копия имен: пока выдача приостановлена, директория может пополниться
+                    stack.append(iter(self._sorted_names(child)[:]))
+                    parents.append(child)
+                    break
+            else:
+                stack.pop()
+                parents.pop()
+
+    def _sorted_children(self, node):
+        """Потомки директории по алфавиту: (имя, узел, последний ли)"""
+
+        if not node.children:
+            return []
+        names = self._sorted_names(node)
+        last = len(names) - 1
+        return [(name, node.children[name], i == last) for i, name in enumerate(names)]
+
+    def iter_listing_recursive(self, path=None, cancel=None):
+        """
+        Строки вывода ls -R: для каждой директории заголовок "путь:" и имена
+
+        Возвращает генератор либо None, если директория не найдена
+        """
+
+        node = self._resolve_path(path) if path else self.current_node
+        if not node or node.type != "dir":
+            return None
+        return self._iter_listing_recursive(node, path or ".", cancel)
+
+    def _iter_listing_recursive(self, start_node, start_path, cancel):
+        stack = [(start_node, start_path)]
+        first = True
+        while stack:
+            if cancel is not None:
+                cancel.check()
+            node, node_path = stack.pop()
+
+            if not first:
+                yield ""
+            first = False
+            yield f"{node_path}:"
+
+            if not node.children:
+                continue
+            names = self._sorted_names(node)[:]  # копия: пока вывод приостановлен, список может пополниться
+            yield from names
+
+            # Поддиректории в алфавитном порядке: в стек в обратном
+            for name in reversed(names):
+                child = node.children[name]
+                if child.type == "dir":
+                    stack.append((child, f"{node_path}/{name}" if node_path != "/" else f"/{name}"))
+
+    def memory_stats(self):
+        """
+        Оценка памяти, занимаемой деревом VFS
+
+        Возвращает словарь с числом узлов и байтами на сами узлы, словари потомков,
+        имена, кэшированные пути, индекс путей и содержимое файлов.
+        Общие (интернированные) строки учитываются один раз
+        """
+
+        nodes = dirs = files = 0
+        node_bytes = children_bytes = name_bytes = path_bytes = content_bytes = 0
+        seen_strings = set()
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            node_bytes += sys.getsizeof(node)
+
+            if id(node.name) not in seen_strings:
+                seen_strings.add(id(node.name))
+                name_bytes += sys.getsizeof(node.name)
+            if node.path is not None:
+                path_bytes += sys.getsizeof(node.path)
+
+            if node.type == "dir":
+                dirs += 1
+                if node.children is not None:
+                    children_bytes += sys.getsizeof(node.children)
+                    stack.extend(node.children.values())
+            else:
+                files += 1
+                content = node._content  # ленивое содержимое не декодируем ради подсчета
+                if content and id(content) not in seen_strings:
+                    seen_strings.add(id(content))
+                    content_bytes += sys.getsizeof(content)
+
+        index_bytes = sys.getsizeof(self._index)
+        structure_bytes = node_bytes + children_bytes + name_bytes + path_bytes + index_bytes
+        return {
+            'nodes': nodes,
+            'dirs': dirs,
+            'files': files,
+            'node_bytes': node_bytes,
+            'children_bytes': children_bytes,
+            'name_bytes': name_bytes,
+            'path_bytes': path_bytes,
+            'index_bytes': index_bytes,
+            'content_bytes': content_bytes,
+            'total_bytes': structure_bytes + content_bytes,
+            'bytes_per_node': structure_bytes / nodes
+        }
+
+    def get_current_path(self):
+        """Возвращает текущий путь в VFS"""
+
+        # Путь каждого узла вычисляется один раз при добавлении в дерево
+        return self.current_node.path
 
     def change_directory(self, path):
         """Изменяет текущую директорию. Алгоритм команды cd"""
@@ -221,6 +1290,31 @@ class VFS:
     def list_directory(self, path=None):
         """Список содержимого директории. Алгоритм команды ls"""
 
+        success, result = self.directory_entries(path)
+        if not success:
+            return False, result
+
+        if not result:
+            return True, "Директория пуста"
+
+        return True, "\n".join(result)
+
+    def _sorted_names(self, node):
+        """Отсортированные имена потомков директории без пересортировки при каждом вызове"""
+
+        names = node.names
+        if names is None:
+            names = node.names = sorted(node.children) if node.children else []
+        return names
+
+    def directory_entries(self, path=None, offset=0, limit=None):
+        """
+        Отсортированные имена в директории либо (False, сообщение об ошибке)
+
+        offset и limit выбирают страницу списка; срез берется из готового
+        отсортированного списка, поэтому страница стоит O(offset + limit) без сортировки
+        """
+
         if path:
             target_node = self._resolve_path(path)
             if not target_node:
@@ -232,14 +1326,58 @@ class VFS:
             return False, f"Не директория: {path if path else self.get_current_path()}"
 
         if not target_node.children:
-            return True, "Директория пуста"
+            return True, []
+
+        names = self._sorted_names(target_node)
+        return True, names[offset:] if limit is None else names[offset:offset + limit]
+
+    def complete_path(self, text, limit=100):
+        """
+        Варианты дополнения пути text: имена из его директории с тем же началом
+
+        Начало ищется двоичным поиском в отсортированном списке имен, поэтому время
+        не зависит от размера директории. Директории дополняются символом /
+        """
+
+        if "/" in text:
+            dir_part, _, prefix = text.rpartition("/")
+            base = dir_part + "/"
+            node = self._resolve_path(dir_part or "/")
+        else:
+            prefix = text
+            base = ""
+            node = self.current_node
 
-        items = list(target_node.children.keys())
-        return True, "\n".join(sorted(items))
+        if not node or node.type != "dir" or not node.children:
+            return []
+
+        names = self._sorted_names(node)
+        children = node.children
+        options = []
+        i = bisect_left(names, prefix)
+        while i < len(names) and len(options) < limit and names[i].startswith(prefix):
+            name = names[i]
+            options.append(base + name + ("/" if children[name].type == "dir" else ""))
+            i += 1
+        return options
     
-    def find_files(self, search_path, pattern):
+    def find_files(self, search_path, pattern, node_type=None, max_depth=None):
         """Поиск файлов по шаблону"""
 
+        matches = self.iter_find(search_path, pattern, node_type, max_depth)
+        return None if matches is None else list(matches)
+
+    def iter_find(self, search_path, pattern, node_type=None, max_depth=None, cancel=None):
+        """
+        Ленивый поиск по шаблону glob (*, ?, [...])
+
+        Возвращает генератор путей в порядке обхода в глубину либо None, если
+        директория не найдена. node_type ("file" или "dir") отбирает узлы по типу,
+        max_depth ограничивает спуск: непосредственные потомки имеют глубину 1.
+        cancel (CancelToken) проверяется по ходу обхода, отмена прерывает его
+        исключением CommandCancelled
+        """
+
         start_node = self._resolve_path(search_path)
         if not start_node:
             return None
@@ -247,50 +1385,89 @@ class VFS:
         if start_node.type != "dir":
             return None
 
-        results = []
-        self._find_recursive(start_node, pattern, search_path, results)
-        return results
+        match = self._compile_pattern(pattern)
 
-    def _find_recursive(self, node, pattern, current_path, results):
-        """Рекурсивный поиск файлов"""
+        if self._name_index is not None:
+            names = self._name_index.candidates(pattern, match)
+            if names is not None:
+                return self._iter_indexed(start_node, names, search_path, node_type, max_depth, cancel)
 
-        if not node.children:
+        return self._iter_find(start_node, match, search_path, node_type, max_depth, cancel)
+
+    def _iter_indexed(self, start_node, names, start_path, node_type, max_depth, cancel=None):
+        """Поиск по индексу имен с выдачей в том же порядке, что и обход дерева"""
+
+        prefix = start_node.path + "/" if start_node.path != "/" else "/"
+        found = []
+
+        for name in names:
+            if cancel is not None:
+                cancel.check()
+            for node in self._name_index.nodes(name):
+                path = node.path
+                if not path.startswith(prefix):
+                    continue
+                if node_type is not None and node.type != node_type:
+                    continue
+
+                relative = path[len(prefix):]
+                if max_depth is not None and relative.count("/") >= max_depth:
+                    continue
+
+                # Ключ упорядочивания - номера узлов на пути от start_node.
+                # Шагов столько, сколько компонентов в relative: после fork() start_node
+                # может быть копией, а не предком узла по ссылкам parent, но seq у них общий
+                key = []
+                current = node
+                for _ in range(relative.count("/") + 1):
+                    key.append(current.seq)
+                    current = current.parent
+                key.reverse()
+                found.append((key, relative))
+
+        found.sort()
+        for _, relative in found:
+            yield f"{start_path}/{relative}" if start_path != "/" else f"/{relative}"
+
+    def _iter_find(self, start_node, match, start_path, node_type, max_depth, cancel=None):
+        """Итеративный обход в глубину со стеком итераторов вместо рекурсии"""
+
+        if not start_node.children or max_depth == 0:
             return
 
-        for name, child in node.children.items():
-            child_path = f"{current_path}/{name}" if current_path != "/" else f"/{name}"
+        # Потомки копируются в список: пока поиск приостановлен между выдачами,
+        # другой сеанс может добавить узел в ту же директорию
+        stack = [(iter(list(start_node.children.items())), start_path, 1)]
+        while stack:
+            # Отмена проверяется при каждом входе в директорию и возврате из нее
+            if cancel is not None:
+                cancel.check()
+            children, current_path, depth = stack[-1]
 
-            # Проверяем соответствие шаблону
-            if self._matches_pattern(name, pattern):
-                results.append(child_path)
+            for name, child in children:
+                child_path = f"{current_path}/{name}" if current_path != "/" else f"/{name}"
 
-            # Рекурсивно ищем в поддиректориях
-            if child.type == "dir":
-                self._find_recursive(child, pattern, child_path, results)
+                # Проверяем соответствие шаблону и типу
+                if match(name) and (node_type is None or child.type == node_type):
+                    yield child_path
 
-    def _matches_pattern(self, filename, pattern):
-        """Проверяет соответствие имени файла шаблону"""
+                # Спускаемся в поддиректорию, если не достигли ограничения глубины
+                if child.type == "dir" and child.children and (max_depth is None or depth < max_depth):
+                    stack.append((iter(list(child.children.items())), child_path, depth + 1))
+                    break
+            else:
+                stack.pop()
 
-        # Простая реализация подстановки * в начале/конце
-        if pattern.startswith('*') and pattern.endswith('*'):
-            # *text* - содержит текст
-            search_text = pattern[1:-1]
-            return search_text in filename
+    def _compile_pattern(self, pattern):
+        """Компилирует шаблон glob в функцию проверки имени"""
 
-        elif pattern.startswith('*'):
-            # *text - заканчивается на текст
-            search_text = pattern[1:]
-            return filename.endswith(search_text)
+        return re.compile(fnmatch.translate(pattern)).match
 
-        elif pattern.endswith('*'):
-            # text* - начинается с текста
-            search_text = pattern[:-1]
-            return filename.startswith(search_text)
+    def get_node(self, path):
+        """Узел по относительному или абсолютному пути (., .. допускаются); None, если не найден"""
+
+        return self._resolve_path(path) if path else self.current_node
 
-        else:
-            # полное совпадение
-            return filename == pattern
-        
     def get_file_content(self, path):
         """Получает содержимое файла по относительному или абсолютному пути"""
 
@@ -337,5 +1514,8 @@ class VFS:
                 False, f"{dirname}: файл с таким именем уже существует")
         
         # Создаем директорию
-        self._add_child(parent_dir, dirname, "dir")
+        node = self._add_child(parent_dir, dirname, "dir")
+        self._generation[0] += 1
+        if self.journal is not None:
+            self.journal.append("mkdir", node.path)
         return True, "Директория создана"
\ No newline at end of file
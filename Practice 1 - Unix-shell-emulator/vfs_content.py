@@ -0,0 +1,342 @@
+import base64
+import codecs
+import mmap
+from collections import OrderedDict
+
+# Ячейки короче этого порога дешевле хранить готовой строкой, чем ссылкой LazyContent
+LAZY_MIN_BYTES = 64
+
+# Блок base64 при построчном чтении; кратен 4, чтобы блоки декодировались независимо
+LINE_BLOCK = 1 << 20
+
+_BASE64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+
+
+def decode_base64(content):
+    """Декодирует base64-содержимое и обрабатывает экранированные символы \\n и \\t"""
+
+    content = base64.b64decode(content).decode('utf-8')
+    if content:
+        content = content.replace('\\n', '\n').replace('\\t', '\t')
+    return content
+
+
+def encode_base64(content):
+    """Кодирует содержимое файла в base64 для записи в CSV"""
+
+    return base64.b64encode(content.encode('utf-8')).decode('ascii')
+
+
+class ContentSource:
+    """
+    Отображенный в память файл образа, из которого лениво читается содержимое файлов
+
+    Узлы хранят только LazyContent (смещение и длину ячейки), а декодирование
+    выполняется при первом обращении. При cache_size > 0 декодированные строки
+    держатся в небольшом LRU, иначе узел сохраняет строку у себя после первого чтения
+    """
+
+    def __init__(self, path, cache_size=0):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()     # (offset, length) -> декодированная строка
+        self.hits = 0
+        self.misses = 0
+
+        with open(path, 'rb') as file:
+            # mmap не умеет отображать пустые файлы
+            if file.seek(0, 2):
+                self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.buffer = b""
+
+    def load(self, ref):
+        """Возвращает декодированное содержимое ячейки"""
+
+        if not self.cache_size:
+            self.misses += 1
+            return self._decode(ref)
+
+        key = (ref.offset, ref.length)
+        cache = self._cache
+        content = cache.get(key)
+        if content is not None:
+            self.hits += 1
+            cache.move_to_end(key)
+            return content
+
+        self.misses += 1
+        content = self._decode(ref)
+        cache[key] = content
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return content
+
+    def _decode(self, ref):
+        """Декодирует байты ячейки по тем же правилам, что и загрузка из CSV"""
+
+        raw = self.buffer[ref.offset:ref.offset + ref.length].decode('utf-8')
+        if not ref.base64:
+            return raw
+        try:
+            return decode_base64(raw)
+        except Exception as e:
+            return f"Ошибка декодирования base64: {str(e)}"
+
+    def iter_lines(self, ref):
+        """
+        Строки содержимого ячейки по одной, как split('\\n') от load(ref)
+
+        Содержимое целиком не декодируется: обычная ячейка делится на строки прямо
+        в отображенном буфере, base64 декодируется блоками по LINE_BLOCK символов.
+        В памяти одновременно только блок и текущая строка
+        """
+
+        buffer = self.buffer
+        start = ref.offset
+        end = ref.offset + ref.length
+
+        if not ref.base64:
+            # Байт \n не встречается внутри многобайтовых символов UTF-8
+            while True:
+                newline = buffer.find(b'\n', start, end)
+                if newline == -1:
+                    yield buffer[start:end].decode('utf-8')
+                    return
+                yield buffer[start:newline].decode('utf-8')
+                start = newline + 1
+
+        if ref.length % 4 or self._has_foreign_bytes(start, end):
+            # Блоки декодируются независимо только у чистого base64 с выравниванием
+            yield from self._decode(ref).split('\n')
+            return
+
+        parts = []
+        for piece in self._iter_base64_text(start, end):
+            position = 0
+            newline = piece.find('\n')
+            while newline != -1:
+                parts.append(piece[position:newline])
+                yield ''.join(parts)
+                parts = []
+                position = newline + 1
+                newline = piece.find('\n', position)
+            parts.append(piece[position:])
+        yield ''.join(parts)
+
+    def _has_foreign_bytes(self, start, end):
+        """Есть ли в ячейке символы вне алфавита base64 (b64decode их бы отбросил)"""
+
+        for position in range(start, end, LINE_BLOCK):
+            if self.buffer[position:min(position + LINE_BLOCK, end)].translate(None, _BASE64_ALPHABET):
+                return True
+        return False
+
+    def _iter_base64_text(self, start, end):
+        """
+        Текст base64-ячейки кусками; ошибка декодирования выдается последним куском
+        с тем же сообщением, что у load
+        """
+
+        produced = False    # часть содержимого уже выдана, сообщение об ошибке - с новой строки
+        try:
+            for piece in self._base64_pieces(start, end):
+                produced = produced or bool(piece)
+                yield piece
+        except Exception as e:
+            prefix = "\n" if produced else ""
+            yield f"{prefix}Ошибка декодирования base64: {str(e)}"
+
+    def _base64_pieces(self, start, end):
+        """
+        Текст base64-ячейки кусками с теми же заменами \\n и \\t, что у decode_base64
+
+        Обратная косая черта в конце куска переносится в следующий, чтобы пара
+        на границе блоков тоже заменялась. Ошибка декодирования не перехватывается
+        """
+
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        carry = ''
+        for position in range(start, end, LINE_BLOCK):
+            data = base64.b64decode(self.buffer[position:min(position + LINE_BLOCK, end)])
+            piece = carry + decoder.decode(data, final=position + LINE_BLOCK >= end)
+            carry = ''
+            if piece.endswith('\\'):
+                piece, carry = piece[:-1], '\\'
+            yield piece.replace('\\n', '\n').replace('\\t', '\t')
+        if carry:
+            yield carry
+
+    def size(self, ref):
+        """
+        Размер содержимого ячейки в байтах UTF-8, как len(load(ref).encode('utf-8'))
+
+        base64 декодируется блоками по LINE_BLOCK символов, декодированная строка
+        нигде не сохраняется
+        """
+
+        if not ref.base64:
+            return ref.length
+
+        start = ref.offset
+        end = ref.offset + ref.length
+        if not ref.length % 4 and not self._has_foreign_bytes(start, end):
+            try:
+                return sum(len(piece.encode('utf-8')) for piece in self._base64_pieces(start, end))
+            except Exception:
+                pass    # размер сообщения об ошибке, как у load
+
+        return len(self.load(ref).encode('utf-8'))
+
+    def copy_to(self, ref, file):
+        """
+        Записывает содержимое ячейки в file байтами UTF-8, как load(ref).encode('utf-8')
+
+        Содержимое не декодируется целиком и в узле не сохраняется: обычная ячейка
+        копируется из отображенного буфера блоками, base64 декодируется блоками
+        по LINE_BLOCK символов. Возвращает число записанных байт
+        """
+
+        buffer = self.buffer
+        start = ref.offset
+        end = ref.offset + ref.length
+
+        if not ref.base64:
+            # Ячейка уже в UTF-8 и при загрузке декодируется без изменений
+            for position in range(start, end, LINE_BLOCK):
+                file.write(buffer[position:min(position + LINE_BLOCK, end)])
+            return ref.length
+
+        if not ref.length % 4 and not self._has_foreign_bytes(start, end):
+            begin = file.tell()
+            written = 0
+            try:
+                for piece in self._base64_pieces(start, end):
+                    written += file.write(piece.encode('utf-8'))
+                return written
+            except Exception:
+                # Записанное начало заменяется сообщением об ошибке, как у load
+                file.seek(begin)
+                file.truncate()
+
+        return file.write(self._decode(ref).encode('utf-8'))
+
+    def cache_info(self):
+        """Статистика LRU декодированного содержимого"""
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'cached': len(self._cache),
+            'cache_size': self.cache_size
+        }
+
+
+class ContentStore:
+    """
+    Хранилище содержимого файлов с адресацией по содержимому
+
+    Одинаковые тела файлов (конфигурации, лицензии, пустые файлы) хранятся одной
+    строкой, на которую ссылаются все такие узлы. Ключ - сама строка: ее хэш
+    Python вычисляет один раз и запоминает в объекте. Для каждого содержимого
+    ведется число ссылок; при замене содержимого узла старое освобождается и
+    покидает хранилище вместе с последней ссылкой. Строки неизменяемы, поэтому
+    запись в один файл не затрагивает другие файлы с тем же содержимым
+    """
+
+    def __init__(self):
+        self._shared = {}       # содержимое -> общий экземпляр строки
+        self._refs = {}         # содержимое -> число ссылок
+        self.logical = 0        # символов во всех ссылках
+        self.stored = 0         # символов в уникальном содержимом
+
+    def __len__(self):
+        return len(self._shared)
+
+    def acquire(self, content):
+        """Регистрирует ссылку на content и возвращает общий экземпляр строки"""
+
+        size = len(content)
+        self.logical += size
+        shared = self._shared.get(content)
+        if shared is None:
+            self._shared[content] = content
+            self._refs[content] = 1
+            self.stored += size
+            return content
+
+        self._refs[shared] += 1
+        return shared
+
+    def merge(self, refs):
+        """
+        Добавляет ссылки другого хранилища: refs - {содержимое: число ссылок}
+
+        Возвращает {содержимое: общий экземпляр} для содержимого, которое здесь
+        уже хранится другим объектом строки: узлы с ним нужно перевести на общий
+        """
+
+        shared_contents = self._shared
+        own_refs = self._refs
+        replaced = {}
+        for content, count in refs.items():
+            size = len(content)
+            self.logical += size * count
+            shared = shared_contents.get(content)
+            if shared is None:
+                shared_contents[content] = content
+                own_refs[content] = count
+                self.stored += size
+            else:
+                own_refs[shared] += count
+                if shared is not content:
+                    replaced[content] = shared
+        return replaced
+
+    def release(self, content):
+        """Снимает ссылку на content; содержимое без ссылок удаляется"""
+
+        refs = self._refs.get(content)
+        if refs is None:
+            return  # ленивое или не зарегистрированное содержимое
+
+        size = len(content)
+        self.logical -= size
+        if refs == 1:
+            del self._refs[content]
+            del self._shared[content]
+            self.stored -= size
+        else:
+            self._refs[content] = refs - 1
+
+    @property
+    def ratio(self):
+        """Во сколько раз содержимое всех файлов больше хранимого"""
+
+        return self.logical / self.stored if self.stored else 1.0
+
+
+def count_quotes(buffer, start, end):
+    """Число кавычек в диапазоне буфера (у mmap нет метода count)"""
+
+    count = 0
+    pos = buffer.find(b'"', start, end)
+    while pos != -1:
+        count += 1
+        pos = buffer.find(b'"', pos + 1, end)
+    return count
+
+
+class LazyContent:
+    """Ссылка на содержимое файла внутри ContentSource"""
+
+    __slots__ = ('source', 'offset', 'length', 'base64')
+
+    def __init__(self, source, offset, length, base64=False):
+        self.source = source
+        self.offset = offset
+        self.length = length
+        self.base64 = base64
+
+    def load(self):
+        return self.source.load(self)
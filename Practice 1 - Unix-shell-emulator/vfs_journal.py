@@ -0,0 +1,129 @@
+"""
+Журнал изменений VFS
+
+Текстовый файл только для дозаписи: первая строка - заголовок с отметкой
+(mtime_ns, size) базового образа, далее по одной JSON-записи на изменение,
+например {"op": "mkdir", "path": "/home/user/new"}. Журнал применяется поверх
+базового CSV или снимка при запуске и сбрасывается после уплотнения в новый образ
+"""
+
+import json
+import os
+import time
+
+MAGIC = "VFSJOURNAL1"
+
+
+def _header(base_stamp):
+    return json.dumps({'journal': MAGIC, 'base': list(base_stamp)}) + "\n"
+
+
+def read_journal(path):
+    """
+    Читает журнал: возвращает (отметка образа, записи, длина корректной части в байтах)
+
+    Оборванная последняя запись (сбой во время дозаписи) отбрасывается
+    """
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    if not data:
+        return None, [], 0
+
+    records = []
+    base_stamp = None
+    position = 0
+    while position < len(data):
+        end = data.find(b"\n", position)
+        if end == -1:
+            break  # запись без перевода строки не была дописана до конца
+        try:
+            record = json.loads(data[position:end].decode('utf-8'))
+        except ValueError:
+            break
+
+        if base_stamp is None:
+            if record.get('journal') != MAGIC:
+                raise ValueError(f"{path}: не является журналом VFS")
+            base_stamp = tuple(record['base'])
+        else:
+            records.append(record)
+        position = end + 1
+
+    return base_stamp, records, position
+
+
+def apply_record(vfs, record):
+    """Применяет одну запись журнала. Возвращает True, если изменение выполнено"""
+
+    if record.get('op') == "mkdir":
+        success, message = vfs.create_directory(record['path'])
+        return success
+    return False
+
+
+class Journal:
+    """
+    Открытый на дозапись журнал
+
+    Каждая запись сразу передается ОС (flush), а fsync выполняется пачками:
+    после sync_every записей или если с прошлого fsync прошло sync_interval секунд
+    """
+
+    def __init__(self, path, base_stamp=(0, 0), valid_length=None, sync_every=64, sync_interval=1.0):
+        self.path = path
+        self.base_stamp = tuple(base_stamp)  # (mtime_ns, size) образа, поверх которого ведется журнал
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.records = 0            # записей, добавленных с момента открытия
+        self._pending = 0           # записей после последнего fsync
+        self._last_sync = time.monotonic()
+
+        self._file = open(path, 'ab')
+        if valid_length is not None and self._file.tell() > valid_length:
+            self._file.truncate(valid_length)  # отрезаем оборванную запись
+            self._file.seek(valid_length)
+        if self._file.tell() == 0:
+            self._file.write(_header(base_stamp).encode('utf-8'))
+            self.sync()
+
+    def append(self, op, path):
+        """Дописывает изменение"""
+
+        self._file.write((json.dumps({'op': op, 'path': path}, ensure_ascii=False) + "\n").encode('utf-8'))
+        self._file.flush()
+        self.records += 1
+        self._pending += 1
+
+        if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """Сбрасывает журнал на диск"""
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def reset(self, base_stamp):
+        """Начинает журнал заново для нового базового образа"""
+
+        self._file.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(_header(base_stamp).encode('utf-8'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        self.base_stamp = tuple(base_stamp)
+
+        self._file = open(self.path, 'ab')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
@@ -0,0 +1,211 @@
+"""
+Двоичный снимок VFS
+
+Файл состоит из заголовка и трех областей:
+    - содержимое файлов: байты UTF-8 подряд;
+    - таблица строк: смещения (uint64, count + 1 штук) и байты строк подряд;
+    - таблица узлов в порядке обхода в глубину, по столбцам:
+      parent (int32, у корня -1), name (uint32, номер строки),
+      kind (uint32: 0 - директория, 1 - файл, k + 2 - нестандартный тип из строки k),
+      content_offset (uint64) и content_length (uint64).
+Все числа little-endian. Каждый столбец читается одним срезом отображенного файла
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from vfs_content import LAZY_MIN_BYTES, ContentSource, LazyContent
+
+MAGIC = b"VFSSNAP1"
+VERSION = 1
+
+# magic, version, node_count, string_count, content_offset, content_length,
+# strings_offset, nodes_offset, source_mtime_ns, source_size
+_HEADER = struct.Struct('<8sIQQQQQQqq')
+
+KIND_DIR = 0
+KIND_FILE = 1
+
+
+def _to_bytes(column):
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_bytes(typecode, data):
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def save_snapshot(vfs, path, source_stamp=(0, 0)):
+    """
+    Сохраняет дерево VFS в двоичный снимок
+
+    source_stamp - (mtime_ns, size) исходного CSV, по нему проверяется актуальность снимка
+    """
+
+    strings = {}
+    string_list = []
+
+    def string_id(text):
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(string_list)
+            string_list.append(text)
+        return index
+
+    parents = array('i')
+    names = array('I')
+    kinds = array('I')
+    offsets = array('Q')
+    lengths = array('Q')
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(b"\0" * _HEADER.size)  # заголовок перезаписывается в конце
+        content_offset = file.tell()
+        content_length = 0
+
+        # Обход в глубину: родитель всегда записан раньше потомков
+        stack = [(vfs.root, -1)]
+        while stack:
+            node, parent_index = stack.pop()
+            index = len(parents)
+            parents.append(parent_index)
+            names.append(string_id(node.name))
+
+            if node.type == "dir":
+                kinds.append(KIND_DIR)
+                offsets.append(0)
+                lengths.append(0)
+                if node.children:
+                    # В стек в обратном порядке, чтобы сохранить порядок потомков
+                    stack.extend((child, index) for child in reversed(list(node.children.values())))
+            else:
+                kinds.append(KIND_FILE if node.type == "file" else string_id(node.type) + 2)
+                content = node._content
+                if content.__class__ is LazyContent:
+                    # Ленивое содержимое копируется из источника, не декодируясь в узел
+                    length = content.source.copy_to(content, file)
+                else:
+                    length = file.write((content or "").encode('utf-8'))
+                offsets.append(content_length)
+                lengths.append(length)
+                content_length += length
+
+        strings_offset = file.tell()
+        encoded = [text.encode('utf-8') for text in string_list]
+        string_offsets = array('Q', [0])
+        for data in encoded:
+            string_offsets.append(string_offsets[-1] + len(data))
+        file.write(_to_bytes(string_offsets))
+        file.write(b"".join(encoded))
+
+        nodes_offset = file.tell()
+        for column in (parents, names, kinds, offsets, lengths):
+            file.write(_to_bytes(column))
+
+        file.seek(0)
+        file.write(_HEADER.pack(MAGIC, VERSION, len(parents), len(string_list),
+                                content_offset, content_length, strings_offset, nodes_offset,
+                                source_stamp[0], source_stamp[1]))
+
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Заголовок снимка в виде словаря либо None, если файл не является снимком"""
+
+    try:
+        with open(path, 'rb') as file:
+            data = file.read(_HEADER.size)
+    except OSError:
+        return None
+
+    if len(data) < _HEADER.size:
+        return None
+
+    (magic, version, node_count, string_count, content_offset, content_length,
+     strings_offset, nodes_offset, source_mtime_ns, source_size) = _HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+
+    return {
+        'node_count': node_count,
+        'string_count': string_count,
+        'content_offset': content_offset,
+        'content_length': content_length,
+        'strings_offset': strings_offset,
+        'nodes_offset': nodes_offset,
+        'source_stamp': (source_mtime_ns, source_size)
+    }
+
+
+def load_snapshot(vfs, path, lazy_content=True, content_cache_size=0):
+    """
+    Загружает дерево VFS из двоичного снимка
+
+    Столбцы таблиц читаются целиком из отображенного в память файла; при lazy_content
+    крупное содержимое файлов не копируется, а читается из снимка при обращении
+    """
+
+    header = read_header(path)
+    if header is None:
+        raise ValueError(f"Не является снимком VFS: {path}")
+
+    source = ContentSource(path, content_cache_size)
+    buffer = source.buffer
+    count = header['node_count']
+
+    # Таблица строк
+    start = header['strings_offset']
+    string_offsets = _from_bytes('Q', buffer[start:start + 8 * (header['string_count'] + 1)])
+    blob_start = start + 8 * (header['string_count'] + 1)
+    blob = buffer[blob_start:blob_start + string_offsets[-1]]
+    strings = [blob[string_offsets[i]:string_offsets[i + 1]].decode('utf-8')
+               for i in range(header['string_count'])]
+
+    # Таблица узлов
+    position = header['nodes_offset']
+    columns = []
+    for typecode, width in (('i', 4), ('I', 4), ('I', 4), ('Q', 8), ('Q', 8)):
+        columns.append(_from_bytes(typecode, buffer[position:position + width * count]))
+        position += width * count
+    parents, names, kinds, offsets, lengths = columns
+
+    content_base = header['content_offset']
+    nodes = [None] * count
+    vfs._reset_tree()
+    nodes[0] = vfs.root
+
+    for i in range(1, count):
+        kind = kinds[i]
+        name = strings[names[i]]
+
+        if kind == KIND_DIR:
+            node = vfs._new_node(name, "dir", "")
+        else:
+            node_type = "file" if kind == KIND_FILE else strings[kind - 2]
+            offset = content_base + offsets[i]
+            length = lengths[i]
+            if lazy_content and length >= LAZY_MIN_BYTES:
+                content = LazyContent(source, offset, length)
+            else:
+                content = vfs._contents.acquire(buffer[offset:offset + length].decode('utf-8'))
+            node = vfs._new_node(name, node_type, content)
+
+        vfs._link(nodes[parents[i]], node)
+        nodes[i] = node
+
+    vfs._content_source = source if lazy_content else None
+    if not lazy_content and isinstance(buffer, mmap.mmap):
+        buffer.close()
+    return count